@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import FunnelCounter
 
-# Register your models here.
+
+@admin.register(FunnelCounter)
+class FunnelCounterAdmin(admin.ModelAdmin):
+    list_display = ('day', 'course', 'payment_mode', 'requests', 'processed', 'enrolled', 'paid')
+    list_filter = ('payment_mode', 'course')
+    date_hierarchy = 'day'
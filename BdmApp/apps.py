@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BdmappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'BdmApp'
+
+    def ready(self):
+        import BdmApp.signals
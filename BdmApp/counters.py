@@ -0,0 +1,26 @@
+from django.db.models import F
+from django.utils import timezone
+
+from .models import FunnelCounter
+
+STAGES = ('requests', 'processed', 'enrolled', 'paid')
+
+
+def _day(value):
+    # request_date / date_enrolled are aware datetimes; bucket by local day
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def bump(when, course_id, payment_mode, **deltas):
+    # bump(request.request_date, course_id, 'emi', requests=1, processed=1)
+    deltas = {stage: delta for stage, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    bucket = {'day': _day(when), 'course_id': course_id, 'payment_mode': payment_mode}
+    if any(delta > 0 for delta in deltas.values()):
+        FunnelCounter.objects.get_or_create(**bucket)
+    # Only decrementing: never create a row for it (e.g. while its course is being deleted).
+    # F() so two concurrent writes can't overwrite each other's increment.
+    FunnelCounter.objects.filter(**bucket).update(
+        **{stage: F(stage) + delta for stage, delta in deltas.items()}
+    )
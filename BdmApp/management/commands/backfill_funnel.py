@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+from StudentApp.models import AdmissionRequest, Enrollment
+from BdmApp.models import FunnelCounter
+
+
+# Rebuilds FunnelCounter from AdmissionRequest / Enrollment. Run it once after
+# deploying the funnel, and any time the counters are suspected to have drifted
+# (e.g. rows changed with queryset.update(), which sends no signals).
+class Command(BaseCommand):
+    help = 'Recompute the admissions funnel counters from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        buckets = {}
+
+        def add(rows, stages):
+            for row in rows:
+                key = (row['day'], row['course_id'], row['payment_mode'])
+                counts = buckets.setdefault(key, dict.fromkeys(('requests', 'processed', 'enrolled', 'paid'), 0))
+                for stage in stages:
+                    counts[stage] += row[stage]
+
+        add(
+            AdmissionRequest.objects
+            .annotate(day=TruncDate('request_date'))
+            .values('day', 'course_id', 'payment_mode')
+            .annotate(requests=Count('id'), processed=Count('id', filter=Q(is_processed=True)))
+            .order_by(),
+            ('requests', 'processed'),
+        )
+        add(
+            Enrollment.objects
+            .annotate(day=TruncDate('date_enrolled'))
+            .values('day', 'course_id', 'payment_mode')
+            .annotate(enrolled=Count('id'), paid=Count('id', filter=Q(is_approved=True)))
+            .order_by(),
+            ('enrolled', 'paid'),
+        )
+
+        counters = [
+            FunnelCounter(day=day, course_id=course_id, payment_mode=mode, **counts)
+            for (day, course_id, mode), counts in buckets.items()
+        ]
+        with transaction.atomic():
+            FunnelCounter.objects.all().delete()
+            FunnelCounter.objects.bulk_create(counters, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(counters)} funnel counter rows.'))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('StudentApp', '0006_admissionrequest_payment_mode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FunnelCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('payment_mode', models.CharField(choices=[('full', 'Full Payment'), ('emi', 'Booking Fee + EMI'), ('loan', 'Education Loan / PDC')], max_length=10)),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('enrolled', models.PositiveIntegerField(default=0)),
+                ('paid', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='StudentApp.course')),
+            ],
+            options={
+                'ordering': ['-day'],
+                'unique_together': {('day', 'course', 'payment_mode')},
+            },
+        ),
+    ]
@@ -1,3 +1,30 @@
 from django.db import models
 
-# Create your models here.
+from StudentApp.models import Course, Enrollment
+
+
+# --- Admissions funnel rollup ---
+# One row per (day, course, payment mode), kept current by signals.py on every
+# AdmissionRequest / Enrollment write, so the dashboard never scans those tables.
+# Stages are counted against the day the request / enrollment was made:
+#   requests   - AdmissionRequest rows
+#   processed  - ... of those with is_processed
+#   enrolled   - Enrollment rows
+#   paid       - ... of those approved by the office (payment received)
+# `python manage.py backfill_funnel` rebuilds the whole table from scratch.
+class FunnelCounter(models.Model):
+    day = models.DateField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    payment_mode = models.CharField(max_length=10, choices=Enrollment.PAYMENT_CHOICES)
+
+    requests = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    enrolled = models.PositiveIntegerField(default=0)
+    paid = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['day', 'course', 'payment_mode']
+        ordering = ['-day']
+
+    def __str__(self):
+        return f"{self.day} - {self.course} ({self.payment_mode})"
@@ -0,0 +1,70 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from StudentApp.models import AdmissionRequest, Enrollment
+from .counters import bump
+
+
+# Remember what the row looked like before the save, so post_save can tell which
+# funnel stages it entered or left (e.g. is_processed ticked in the admin list,
+# course changed after the fact).
+def _snapshot(instance, fields):
+    if instance.pk is None:
+        return None
+    return type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def _apply(old, new, date_field, flag_field, first_stage, flag_stage):
+    # old/new are dicts (or None) with course_id, payment_mode, the date and the flag
+    if old == new:
+        return
+    if old:
+        bump(old[date_field], old['course_id'], old['payment_mode'],
+             **{first_stage: -1, flag_stage: -1 if old[flag_field] else 0})
+    if new:
+        bump(new[date_field], new['course_id'], new['payment_mode'],
+             **{first_stage: 1, flag_stage: 1 if new[flag_field] else 0})
+
+
+REQUEST_FIELDS = ('course_id', 'payment_mode', 'request_date', 'is_processed')
+ENROLLMENT_FIELDS = ('course_id', 'payment_mode', 'date_enrolled', 'is_approved')
+
+
+def _values(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+# --- AdmissionRequest: requests / processed ---
+@receiver(pre_save, sender=AdmissionRequest)
+def remember_request(sender, instance, **kwargs):
+    instance._funnel_old = _snapshot(instance, REQUEST_FIELDS)
+
+
+@receiver(post_save, sender=AdmissionRequest)
+def count_request(sender, instance, **kwargs):
+    _apply(getattr(instance, '_funnel_old', None), _values(instance, REQUEST_FIELDS),
+           'request_date', 'is_processed', 'requests', 'processed')
+
+
+@receiver(post_delete, sender=AdmissionRequest)
+def uncount_request(sender, instance, **kwargs):
+    _apply(_values(instance, REQUEST_FIELDS), None,
+           'request_date', 'is_processed', 'requests', 'processed')
+
+
+# --- Enrollment: enrolled / paid ---
+@receiver(pre_save, sender=Enrollment)
+def remember_enrollment(sender, instance, **kwargs):
+    instance._funnel_old = _snapshot(instance, ENROLLMENT_FIELDS)
+
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment(sender, instance, **kwargs):
+    _apply(getattr(instance, '_funnel_old', None), _values(instance, ENROLLMENT_FIELDS),
+           'date_enrolled', 'is_approved', 'enrolled', 'paid')
+
+
+@receiver(post_delete, sender=Enrollment)
+def uncount_enrollment(sender, instance, **kwargs):
+    _apply(_values(instance, ENROLLMENT_FIELDS), None,
+           'date_enrolled', 'is_approved', 'enrolled', 'paid')
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('funnel/', views.funnel_dashboard, name='bdm_funnel'),
+]
@@ -1,3 +1,62 @@
+from datetime import timedelta
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import Sum
 from django.shortcuts import render
+from django.utils import timezone
+
+from StudentApp.models import Course, Enrollment
+from .counters import STAGES
+from .models import FunnelCounter
+
+
+def _with_rates(row):
+    # Conversion of each stage from the one before it, as a whole percentage
+    previous = None
+    for stage in STAGES:
+        row[stage] = row[stage] or 0
+        if previous is not None:
+            row[f'{stage}_rate'] = round(row[stage] * 100 / row[previous]) if row[previous] else 0
+        previous = stage
+    return row
+
+
+# --- BDM: ADMISSIONS FUNNEL ---
+# Reads only the FunnelCounter rollup, never AdmissionRequest / Enrollment,
+# so it costs the same on a quiet day and in the middle of admission season.
+@staff_member_required
+def funnel_dashboard(request):
+    try:
+        days = max(1, min(int(request.GET.get('days', 30)), 366))
+    except ValueError:
+        days = 30
+    selected_course = request.GET.get('course', '')
+    selected_mode = request.GET.get('mode', '')
+
+    since = timezone.localdate() - timedelta(days=days - 1)
+    counters = FunnelCounter.objects.filter(day__gte=since)
+    if selected_course.isdigit():
+        counters = counters.filter(course_id=int(selected_course))
+    if selected_mode:
+        counters = counters.filter(payment_mode=selected_mode)
+
+    sums = {stage: Sum(stage) for stage in STAGES}
+    mode_labels = dict(Enrollment.PAYMENT_CHOICES)
+
+    by_mode = []
+    for row in counters.values('payment_mode').annotate(**sums).order_by('payment_mode'):
+        row['label'] = mode_labels.get(row['payment_mode'], row['payment_mode'])
+        by_mode.append(_with_rates(row))
 
-# Create your views here.
+    context = {
+        'totals': _with_rates(counters.aggregate(**sums)),
+        'by_course': [_with_rates(row) for row in counters.values('course__name').annotate(**sums).order_by('course__name')],
+        'by_day': [_with_rates(row) for row in counters.values('day').annotate(**sums).order_by('-day')],
+        'by_mode': by_mode,
+        'courses': Course.objects.order_by('name').values('id', 'name'),
+        'modes': Enrollment.PAYMENT_CHOICES,
+        'days': days,
+        'selected_course': selected_course,
+        'selected_mode': selected_mode,
+    }
+    return render(request, 'bdm_funnel.html', context)
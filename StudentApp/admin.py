@@ -1,9 +1,11 @@
 from django.contrib import admin
-from .models import AdmissionRequest, Student, Batch, Document, FeePayment, LeaveApplication, ExamResult, Placement, Course, Enrollment
+from .models import AdmissionRequest, Student, Batch, Document, FeePayment, Installment, LeaveApplication, ExamResult, Placement, PlacementRule, Course, Enrollment, Notification
 
 # --- 1. STUDENT ADMIN ---
 class StudentAdmin(admin.ModelAdmin):
-    list_display = ('student_id', 'get_student_name', 'course', 'batch_no', 'is_fee_paid', 'placement_willingness')
+    list_display = ('student_id', 'get_student_name', 'course', 'batch', 'is_fee_paid', 'placement_willingness')
+    list_filter = ('batch',)
+    list_select_related = ('user', 'course', 'batch')
     
     def get_student_name(self, obj):
         if obj.user.first_name:
@@ -36,7 +38,7 @@ admin.site.register(LeaveApplication, LeaveApplicationAdmin)
 # --- 3. COURSE ADMIN (Updated) ---
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
-    list_display = ('name', 'price')
+    list_display = ('name', 'price', 'seat_capacity', 'seats_taken')
     # CRITICAL: This allows 'Enrollment' to search for courses
     search_fields = ('name',) 
 
@@ -67,8 +69,33 @@ class AdmissionRequestAdmin(admin.ModelAdmin):
     list_filter = ('is_processed', 'course')
     search_fields = ('full_name', 'phone')
 
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'kind', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('recipient',)
+
+@admin.register(Batch)
+class BatchAdmin(admin.ModelAdmin):
+    list_display = ('name', 'student_count', 'timetable_link')
+    search_fields = ('name',)
+
+
+@admin.register(PlacementRule)
+class PlacementRuleAdmin(admin.ModelAdmin):
+    list_display = ('course', 'min_attendance_pct', 'min_exams_passed', 'require_fee_paid', 'require_documents')
+    list_select_related = ('course',)
+
+
+@admin.register(Installment)
+class InstallmentAdmin(admin.ModelAdmin):
+    list_display = ('student', 'enrollment', 'number', 'due_date', 'amount', 'status', 'paid_on')
+    list_filter = ('status',)
+    date_hierarchy = 'due_date'
+    search_fields = ('student__student_id', 'student__user__first_name')
+    list_select_related = ('student__user', 'enrollment__student_user', 'enrollment__course')
+
 # --- 5. REGISTER OTHER MODELS ---
-admin.site.register(Batch)
 admin.site.register(Document)
 admin.site.register(FeePayment)
 admin.site.register(ExamResult)
@@ -0,0 +1,170 @@
+import gzip
+import hashlib
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.http import require_GET
+
+from . import attendance_history
+from .models import Attendance, Course, Enrollment, LeaveApplication, Student
+
+try:
+    import brotli
+except ImportError:  # optional - gzip only without it
+    brotli = None
+
+
+# --- READ-ONLY JSON API (mobile app) ---
+#
+#   GET /api/<resource>/?fields=id,date,status&limit=100&cursor=<next from last page>
+#
+# Rows come straight from .values() (no model instances), ordered by id and
+# paged with an opaque cursor, so deep pages cost the same as the first one.
+# Students only ever see their own rows; staff see everything; courses are public.
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+# Smaller than this and compressing costs more than it saves
+MIN_COMPRESS_SIZE = 200
+
+CURSOR_SALT = 'StudentApp.api.cursor'
+
+# name -> (queryset, {output key: values() lookup}, lookup to the owning User or None)
+RESOURCES = {
+    'courses': (
+        Course.objects.all(),
+        {'id': 'id', 'name': 'name', 'price': 'price', 'description': 'description', 'image': 'image'},
+        None,
+    ),
+    'students': (
+        Student.objects.all(),
+        {
+            'id': 'id', 'student_id': 'student_id', 'name': 'user__first_name', 'course': 'course_id',
+            'batch': 'batch_id', 'batch_no': 'batch__name', 'phone': 'phone', 'date_of_birth': 'date_of_birth', 'address': 'address',
+            'gender': 'gender', 'is_fee_paid': 'is_fee_paid', 'documents_verified': 'documents_verified',
+            'placement_willingness': 'placement_willingness',
+        },
+        'user',
+    ),
+    'attendance': (
+        Attendance.objects.all(),
+        {'id': 'id', 'student': 'student_id', 'date': 'date', 'status': 'status'},
+        'student__user',
+    ),
+    'leaves': (
+        LeaveApplication.objects.all(),
+        {
+            'id': 'id', 'student': 'student_id', 'start_date': 'start_date', 'end_date': 'end_date',
+            'reason': 'reason', 'status': 'status', 'applied_on': 'applied_on',
+        },
+        'student__user',
+    ),
+    'enrollments': (
+        Enrollment.objects.all(),
+        {
+            'id': 'id', 'course': 'course_id', 'payment_mode': 'payment_mode', 'amount_paid': 'amount_paid',
+            'is_approved': 'is_approved', 'date_enrolled': 'date_enrolled',
+        },
+        'student_user',
+    ),
+}
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+def _compress(request, response):
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if len(response.content) < MIN_COMPRESS_SIZE:
+        return response
+
+    accepted = {
+        part.split(';')[0].strip().lower()
+        for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')
+    }
+    if brotli is not None and 'br' in accepted:
+        response.content = brotli.compress(response.content)
+        response['Content-Encoding'] = 'br'
+    elif 'gzip' in accepted:
+        # mtime=0 keeps the bytes identical for identical content
+        response.content = gzip.compress(response.content, mtime=0)
+        response['Content-Encoding'] = 'gzip'
+    return response
+
+
+@require_GET
+def resource_list(request, resource):
+    queryset, fields, owner = RESOURCES[resource]
+
+    if owner is not None:
+        if not request.user.is_authenticated:
+            return _error('Login required.', 401)
+        if not request.user.is_staff:
+            queryset = queryset.filter(**{owner: request.user})
+
+    # Sparse fields: ?fields=id,date,status (id is always included for the cursor)
+    if request.GET.get('fields'):
+        wanted = [name for name in request.GET['fields'].split(',') if name]
+        unknown = [name for name in wanted if name not in fields]
+        if unknown:
+            return _error(f"Unknown field(s): {', '.join(unknown)}", 400)
+        selected = ['id'] + [name for name in wanted if name != 'id']
+    else:
+        selected = list(fields)
+
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        return _error('limit must be a number.', 400)
+
+    after = 0
+    if request.GET.get('cursor'):
+        try:
+            after = signing.loads(request.GET['cursor'], salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return _error('Invalid cursor.', 400)
+        queryset = queryset.filter(id__gt=after)
+
+    columns = [fields[name] for name in selected]
+    if resource == 'attendance':
+        # Attendance history spans the live table and the yearly archives
+        student_ids = None
+        if not request.user.is_staff:
+            student_ids = list(Student.objects.filter(user=request.user).values_list('id', flat=True))
+        rows = attendance_history.rows_after(columns, after, limit + 1, student_ids)
+    else:
+        rows = list(queryset.order_by('id').values_list(*columns)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = signing.dumps(rows[-1][0], salt=CURSOR_SALT)
+
+    results = [dict(zip(selected, row)) for row in rows]
+    if 'image' in selected:
+        for item in results:
+            item['image'] = settings.MEDIA_URL + item['image'] if item['image'] else None
+
+    body = _dumps({'results': results, 'next': next_cursor})
+
+    # Weak ETag of the uncompressed body, so it holds whichever encoding was sent
+    etag = 'W/"%s"' % hashlib.md5(body.encode(), usedforsecurity=False).hexdigest()
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        patch_vary_headers(not_modified, ('Accept-Encoding', 'Cookie'))
+        return not_modified
+
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ('Cookie',))
+    return _compress(request, response)
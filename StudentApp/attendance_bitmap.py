@@ -0,0 +1,218 @@
+import calendar
+from datetime import date
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery
+
+from .models import AttendanceMonth
+
+# --- PACKED ATTENDANCE (AttendanceMonth) ---
+#
+# Same information as Attendance - at most one status per student per day - in
+# one row per student per month: two bits per day in a 64-bit integer, day 1 in
+# the lowest two bits. About 1/20th of the rows, and a month's figures are a
+# few integer operations instead of an aggregate over ~22 rows.
+#
+# Writes change only their own day's bits inside the UPDATE, so concurrent
+# marks for different days of the same month don't overwrite each other.
+#
+# Migration path: `manage.py attendance_bitmap migrate` fills it from the row
+# table (live + archived years), ATTENDANCE_BITMAP_MIRROR = True keeps it in
+# step with new Attendance writes, `attendance_bitmap verify` compares the two.
+
+CODES = {'Present': 1, 'Absent': 2, 'Late': 3}
+STATUSES = {code: status for status, code in CODES.items()}
+
+DAYS = 31
+BITS_PER_MONTH = 2 * DAYS
+# The low bit of every day's pair: 0b0101...01
+LANES = sum(1 << (2 * i) for i in range(DAYS))
+
+
+def _month(day):
+    return day.replace(day=1)
+
+
+def _shift(day):
+    return 2 * (day.day - 1)
+
+
+def _code(status):
+    try:
+        return CODES[status]
+    except KeyError:
+        raise ValueError(f'Unknown attendance status {status!r}')
+
+
+def lanes(bits):
+    # (marked, present, absent, late): one bit per day, at the low bit of its pair
+    low, high = bits & LANES, (bits >> 1) & LANES
+    return low | high, low & ~high, high & ~low, low & high
+
+
+# --- Writes ---
+
+def mark(student_id, day, status):
+    # Attendance.objects.update_or_create(student=..., date=day, defaults={'status': status})
+    shift, code = _shift(day), _code(status)
+    set_day = F('bits').bitand(~(3 << shift)).bitor(code << shift)
+    rows = AttendanceMonth.objects.filter(student_id=student_id, month=_month(day))
+    if rows.update(bits=set_day):
+        return
+    try:
+        with transaction.atomic():
+            AttendanceMonth.objects.create(student_id=student_id, month=_month(day), bits=code << shift)
+    except IntegrityError:
+        # Someone created the month first; set our day on their row
+        rows.update(bits=set_day)
+
+
+def unmark(student_id, day):
+    # Attendance.objects.filter(student=..., date=day).delete()
+    AttendanceMonth.objects.filter(student_id=student_id, month=_month(day)).update(
+        bits=F('bits').bitand(~(3 << _shift(day)))
+    )
+
+
+def mark_many(day, marks):
+    # A whole register at once: {student_id: status}. One INSERT for months
+    # nobody had yet, then one UPDATE per status - setting a day's bits is
+    # idempotent, so rows created concurrently are simply updated too.
+    month, shift = _month(day), _shift(day)
+    AttendanceMonth.objects.bulk_create(
+        [AttendanceMonth(student_id=student_id, month=month) for student_id in marks],
+        ignore_conflicts=True,
+    )
+    by_code = {}
+    for student_id, status in marks.items():
+        by_code.setdefault(_code(status), []).append(student_id)
+    for code, student_ids in by_code.items():
+        AttendanceMonth.objects.filter(student_id__in=student_ids, month=month).update(
+            bits=F('bits').bitand(~(3 << shift)).bitor(code << shift)
+        )
+
+
+# --- Reads ---
+
+def decode(month, bits):
+    # [(date, status)] for the marked days of one month, oldest first
+    days = calendar.monthrange(month.year, month.month)[1]
+    return [
+        (month.replace(day=day), STATUSES[(bits >> (2 * (day - 1))) & 3])
+        for day in range(1, days + 1)
+        if (bits >> (2 * (day - 1))) & 3
+    ]
+
+
+def status_on(student_id, day):
+    bits = AttendanceMonth.objects.filter(student_id=student_id, month=_month(day)).values_list('bits', flat=True).first()
+    return STATUSES.get(((bits or 0) >> _shift(day)) & 3)
+
+
+def records(student_id, start=None, end=None):
+    # [(date, status)] newest first, like Attendance's default ordering
+    months = AttendanceMonth.objects.filter(student_id=student_id)
+    if start:
+        months = months.filter(month__gte=_month(start))
+    if end:
+        months = months.filter(month__lte=end)
+    result = []
+    for month, bits in months.order_by('-month').values_list('month', 'bits'):
+        result += [
+            (day, status) for day, status in reversed(decode(month, bits))
+            if (start is None or day >= start) and (end is None or day <= end)
+        ]
+    return result
+
+
+def summary(bits):
+    marked, present, absent, late = lanes(bits)
+    days = marked.bit_count()
+    return {
+        'days': days,
+        'present': present.bit_count(),
+        'absent': absent.bit_count(),
+        'late': late.bit_count(),
+        'percentage': round(present.bit_count() * 100 / days, 1) if days else 0,
+    }
+
+
+def month_summary(student_id, month):
+    bits = AttendanceMonth.objects.filter(student_id=student_id, month=_month(month)).values_list('bits', flat=True).first()
+    return summary(bits or 0)
+
+
+def month_report(students, month):
+    # {student_id: summary} for a Student queryset (e.g. one batch), one query
+    bits = AttendanceMonth.objects.filter(student=OuterRef('pk'), month=_month(month)).values('bits')[:1]
+    rows = students.annotate(month_bits=Subquery(bits)).values_list('id', 'month_bits')
+    return {student_id: summary(bits or 0) for student_id, bits in rows}
+
+
+def counts(student_id):
+    # (total days, present days), like attendance_history.student_counts
+    total = present = 0
+    for bits in AttendanceMonth.objects.filter(student_id=student_id).values_list('bits', flat=True):
+        marked, present_lanes, _, _ = lanes(bits)
+        total += marked.bit_count()
+        present += present_lanes.bit_count()
+    return total, present
+
+
+def _history_lanes(student_id):
+    # Every month back to back in one integer (month k at bit k * 62), so a
+    # streak can run across month ends. Returns (present, breaks) lanes.
+    present = breaks = 0
+    first = None
+    for month, bits in AttendanceMonth.objects.filter(student_id=student_id).order_by('month').values_list('month', 'bits'):
+        first = first or month
+        offset = BITS_PER_MONTH * ((month.year - first.year) * 12 + month.month - first.month)
+        _, month_present, absent, late = lanes(bits)
+        present |= month_present << offset
+        breaks |= (absent | late) << offset
+    return present, breaks
+
+
+def streaks(student_id):
+    # (current, longest) run of Present days. Absent and Late end a run;
+    # unmarked days (weekends, holidays) don't.
+    present, breaks = _history_lanes(student_id)
+    current = (present >> breaks.bit_length()).bit_count()
+
+    longest = 0
+    while breaks:
+        lowest = breaks & -breaks
+        longest = max(longest, (present & (lowest - 1)).bit_count())
+        present &= ~((lowest << 1) - 1)
+        breaks ^= lowest
+    return current, max(longest, present.bit_count())
+
+
+# --- Mirroring Attendance writes (ATTENDANCE_BITMAP_MIRROR) ---
+
+def mirror_enabled():
+    return getattr(settings, 'ATTENDANCE_BITMAP_MIRROR', False)
+
+
+def pack(rows):
+    # {(student_id, month): bits} from (student_id, date, status) rows
+    months = {}
+    for student_id, day, status in rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        key = (student_id, _month(day))
+        months[key] = months.get(key, 0) | (_code(status) << _shift(day))
+    return months
+
+
+def rebuild_students(student_ids, rows):
+    # Overwrite the students' months from their (student_id, date, status) rows
+    months = pack(rows)
+    with transaction.atomic():
+        AttendanceMonth.objects.filter(student_id__in=student_ids).delete()
+        AttendanceMonth.objects.bulk_create(
+            [AttendanceMonth(student_id=student_id, month=month, bits=bits) for (student_id, month), bits in months.items()],
+            batch_size=1000,
+        )
+    return len(months)
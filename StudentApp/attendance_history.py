@@ -0,0 +1,238 @@
+import re
+import sqlite3
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Attendance
+
+# --- ATTENDANCE HISTORY (live table + yearly archives) ---
+#
+# `manage.py archive_attendance` moves closed academic years out of the
+# Attendance table into ATTENDANCE_ARCHIVE_DIR/attendance_<year>.sqlite3.
+# The helpers below ATTACH those files as schema attendance_<year> the first
+# time a connection reads history, and read live + archived rows with one
+# UNION ALL query. SQLite ATTACHes at most SQLITE_LIMIT_ATTACHED (10) files per
+# connection, so with more archived years than that the query runs once per
+# group of years (DETACHing the previous group) and the results are combined.
+# Anything that shows a student's full history should go through here rather
+# than Attendance.objects, which only sees the current years.
+
+LIVE_TABLE = Attendance._meta.db_table
+ARCHIVE_TABLE = 'attendance'
+COLUMNS = ('id', 'student_id', 'date', 'status')
+
+_FILE_RE = re.compile(r'^attendance_(\d{4})\.sqlite3$')
+
+
+def academic_year(day):
+    # The academic year starting in ACADEMIC_YEAR_START_MONTH of year N is "N"
+    return day.year if day.month >= settings.ACADEMIC_YEAR_START_MONTH else day.year - 1
+
+
+def academic_year_range(year):
+    # [start, end) dates of an academic year
+    month = settings.ACADEMIC_YEAR_START_MONTH
+    return date(year, month, 1), date(year + 1, month, 1)
+
+
+def archive_path(year):
+    return Path(settings.ATTENDANCE_ARCHIVE_DIR) / f'attendance_{year}.sqlite3'
+
+
+def schema_name(year):
+    return f'attendance_{int(year)}'
+
+
+# folder -> (mtime, years); re-listed only when a file is added or removed
+_years_cache = {}
+
+
+def archive_years():
+    folder = Path(settings.ATTENDANCE_ARCHIVE_DIR)
+    try:
+        stamp = folder.stat().st_mtime_ns
+    except OSError:
+        return []
+    cached = _years_cache.get(folder)
+    if cached is None or cached[0] != stamp:
+        matches = (_FILE_RE.match(path.name) for path in folder.iterdir())
+        cached = _years_cache[folder] = (stamp, sorted(int(match.group(1)) for match in matches if match))
+    return list(cached[1])
+
+
+class ArchiveUnavailable(RuntimeError):
+    # A yearly archive exists but isn't ATTACHed, and can't be right now
+    pass
+
+
+def _attached(conn):
+    # Schemas ATTACHed on this connection, so readers needn't ask SQLite each time
+    if not hasattr(conn, 'attendance_archives'):
+        conn.attendance_archives = set()
+    return conn.attendance_archives
+
+
+def forget_attached(conn):
+    # connection_created receiver (signals.py): a new connection has nothing ATTACHed
+    conn.attendance_archives = set()
+
+
+def _max_attached(conn):
+    return conn.connection.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+
+
+def _outside_transaction(conn, year):
+    if conn.in_atomic_block:
+        # SQLite refuses ATTACH / DETACH inside a transaction; better an error
+        # than totals that silently leave the year out
+        raise ArchiveUnavailable(
+            f'Attendance archive {year} is not attached to this connection and '
+            f'cannot be inside a transaction; retry outside transaction.atomic()'
+        )
+
+
+def _use(conn, years, create=False):
+    # ATTACH the years' files to conn, first DETACHing others not in `years`
+    # if SQLite's limit leaves no room. Returns their schema names.
+    attached = _attached(conn)
+    missing = [year for year in years if schema_name(year) not in attached]
+    if missing:
+        _outside_transaction(conn, missing[0])
+        keep = {schema_name(year) for year in years}
+        surplus = len(attached) + len(missing) - _max_attached(conn)
+        for schema in sorted(attached - keep)[:max(surplus, 0)]:
+            conn.connection.execute(f'DETACH DATABASE {schema}')
+            attached.discard(schema)
+        for year in missing:
+            if create:
+                archive_path(year).parent.mkdir(parents=True, exist_ok=True)
+                # Directory mtimes are coarse; don't trust them for our own new file
+                _years_cache.clear()
+            conn.connection.execute(f'ATTACH DATABASE ? AS {schema_name(year)}', [str(archive_path(year))])
+            attached.add(schema_name(year))
+    if create:
+        for year in years:
+            schema = schema_name(year)
+            conn.connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {schema}.{ARCHIVE_TABLE} ('
+                'id integer NOT NULL PRIMARY KEY, student_id bigint NOT NULL, '
+                'date date NOT NULL, status varchar(10) NOT NULL)'
+            )
+            conn.connection.execute(
+                f'CREATE INDEX IF NOT EXISTS {schema}.attendance_student_date '
+                f'ON {ARCHIVE_TABLE} (student_id, date)'
+            )
+    return [schema_name(year) for year in years]
+
+
+def attach(year, create=False):
+    # ATTACH the year's file to the default connection (creating file + table
+    # when asked) and return the schema name. Raises ArchiveUnavailable inside
+    # a transaction for a year the connection doesn't have yet.
+    if connection.vendor != 'sqlite':
+        return None
+    connection.ensure_connection()
+    return _use(connection, [year], create)[0]
+
+
+def _source_groups():
+    # Lists of tables to UNION, each ATTACHed in turn: the live table plus as
+    # many archive years as fit, then the next years
+    years = archive_years() if connection.vendor == 'sqlite' else []
+    if not years:
+        yield [f'"{LIVE_TABLE}"']
+        return
+    connection.ensure_connection()
+    size = _max_attached(connection)
+    for start in range(0, len(years), size):
+        schemas = _use(connection, years[start:start + size])
+        live = [f'"{LIVE_TABLE}"'] if start == 0 else []
+        yield live + [f'{schema}.{ARCHIVE_TABLE}' for schema in schemas]
+
+
+def _unions(where, params, columns=COLUMNS):
+    # (sql, params) per group of sources; just one unless there are more
+    # archived years than SQLite can ATTACH at once. Run each before asking
+    # for the next, which may DETACH its schemas.
+    select = ', '.join(f'"{column}"' for column in columns)
+    for sources in _source_groups():
+        sql = ' UNION ALL '.join(f'SELECT {select} FROM {source} WHERE {where}' for source in sources)
+        yield sql, list(params) * len(sources)
+
+
+def student_records(student_id):
+    # Attendance objects (live and archived), newest first
+    records = []
+    for sql, params in _unions('student_id = %s', [student_id]):
+        records += Attendance.objects.raw(f'SELECT * FROM ({sql}) ORDER BY date DESC', params)
+    records.sort(key=lambda record: record.date, reverse=True)
+    return records
+
+
+def student_counts(student_id):
+    # (total days, present days) across live and archived years
+    total = present = 0
+    with connection.cursor() as cursor:
+        for sql, params in _unions('student_id = %s', [student_id]):
+            cursor.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END), 0) FROM ({sql})",
+                params,
+            )
+            days, present_days = cursor.fetchone()
+            total, present = total + days, present + present_days
+    return total, present
+
+
+def rows_after(columns, after_id, limit, student_ids=None):
+    # Tuples of `columns` with id > after_id in id order, for paged exports.
+    # student_ids=None means every student.
+    where, params = 'id > %s', [after_id]
+    if student_ids is not None:
+        if not student_ids:
+            return []
+        where += f" AND student_id IN ({', '.join(['%s'] * len(student_ids))})"
+        params += list(student_ids)
+    rows = []
+    id_index = columns.index('id')
+    with connection.cursor() as cursor:
+        for sql, group_params in _unions(where, params, columns):
+            cursor.execute(f'SELECT * FROM ({sql}) ORDER BY id LIMIT %s', group_params + [limit])
+            rows += cursor.fetchall()
+    rows.sort(key=lambda row: row[id_index])
+    return rows[:limit]
+
+
+def counts_by_student(student_ids):
+    # {student_id: (total days, present days)} across live and archived years,
+    # one grouped query for the lot. Students without attendance are left out.
+    if not student_ids:
+        return {}
+    where = f"student_id IN ({', '.join(['%s'] * len(student_ids))})"
+    counts = {}
+    with connection.cursor() as cursor:
+        for sql, params in _unions(where, list(student_ids), ('student_id', 'status')):
+            cursor.execute(
+                f"SELECT student_id, COUNT(*), COALESCE(SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END), 0) "
+                f"FROM ({sql}) GROUP BY student_id",
+                params,
+            )
+            for student_id, total, present in cursor.fetchall():
+                before = counts.get(student_id, (0, 0))
+                counts[student_id] = (before[0] + total, before[1] + present)
+    return counts
+
+
+def student_rows(student_ids):
+    # (student_id, date, status) for the students across live and archived years
+    if not student_ids:
+        return []
+    where = f"student_id IN ({', '.join(['%s'] * len(student_ids))})"
+    rows = []
+    with connection.cursor() as cursor:
+        for sql, params in _unions(where, list(student_ids), ('student_id', 'date', 'status')):
+            cursor.execute(sql, params)
+            rows += cursor.fetchall()
+    return rows
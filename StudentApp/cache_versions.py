@@ -0,0 +1,42 @@
+import time
+
+from django.core.cache import caches
+
+
+# --- MODEL VERSIONS FOR FRAGMENT CACHING ---
+# Every model we cache HTML for has a version number in the cache. Templates put
+# it in their {% cache %} keys, and signals.py bumps it whenever a row changes,
+# so stale fragments are simply never looked up again.
+#
+# Versions live in the 'template_fragments' cache next to the fragments, which
+# every worker process shares (settings.CACHES), so an edit saved by one worker
+# changes the keys all of them look up.
+
+def _versions():
+    return caches['template_fragments']
+
+
+def _version_key(label):
+    return f'model-version:{label}'
+
+
+def _new_version():
+    # From the clock, so a key that was evicted never reuses an old number
+    return time.time_ns()
+
+
+def model_version(label):
+    key = _version_key(label)
+    version = _versions().get(key)
+    if version is None:
+        _versions().add(key, _new_version(), None)
+        version = _versions().get(key)
+    return version
+
+
+def bump_model_version(label):
+    # A fresh value rather than incr(): the file cache's incr is a read and a
+    # write, so two workers bumping at once could both write the same number
+    version = _new_version()
+    _versions().set(_version_key(label), version, None)
+    return version
@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+# Exposes the {% cache %} timeout to every template, so it can be switched off (TEMPLATE_FRAGMENT_TIMEOUT=0)
+def fragment_cache(request):
+    return {'fragment_timeout': settings.TEMPLATE_FRAGMENT_TIMEOUT}
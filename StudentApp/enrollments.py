@@ -0,0 +1,85 @@
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from .models import Course, Enrollment, Student
+
+# Paid up front for EMI / loan enrollments; full payment pays course.price
+BOOKING_FEE = 5000
+
+
+class CourseFull(Exception):
+    pass
+
+
+# --- ENROLLMENT (enroll_course view) ---
+#
+# Safe to call any number of times for the same submit, and from many requests
+# at once on admission day:
+#   - the form carries an idempotency key, so a resubmitted form returns the
+#     enrollment it already created;
+#   - one enrollment per user and course (unique constraint); a second submit,
+#     or the loser of a race, gets the existing one back;
+#   - the seat is taken with a conditional F() update in the same transaction,
+#     so Course.seats_taken never goes past seat_capacity.
+
+def new_idempotency_key():
+    return uuid.uuid4().hex
+
+
+def student_for(user, **details):
+    # The user's Student profile, created on first enrollment with the same
+    # STU-<id> numbering the admission approval uses. `details` (phone, address,
+    # gender) are saved when given.
+    student, created = Student.objects.get_or_create(
+        user=user, defaults={'student_id': f"STU-{user.id + 1000}", **details},
+    )
+    changed = [field for field, value in details.items() if getattr(student, field) != value]
+    if changed and not created:
+        for field in changed:
+            setattr(student, field, details[field])
+        student.save(update_fields=changed)
+    return student
+
+
+def _take_seat(course):
+    has_room = Q(seat_capacity__isnull=True) | Q(seats_taken__lt=F('seat_capacity'))
+    return Course.objects.filter(pk=course.pk).filter(has_room).update(seats_taken=F('seats_taken') + 1) == 1
+
+
+def enroll(user, course, payment_mode, idempotency_key=None, **details):
+    # Returns (enrollment, created). Raises CourseFull when there's no seat left.
+    if idempotency_key:
+        existing = Enrollment.objects.filter(idempotency_key=idempotency_key, student_user=user).first()
+        if existing:
+            return existing, False
+
+    try:
+        with transaction.atomic():
+            student_for(user, **details)
+
+            existing = Enrollment.objects.filter(student_user=user, course=course).first()
+            if existing:
+                return existing, False
+
+            if not _take_seat(course):
+                raise CourseFull(course.name)
+
+            enrollment = Enrollment(
+                student_user=user,
+                course=course,
+                payment_mode=payment_mode,
+                amount_paid=course.price if payment_mode == 'full' else BOOKING_FEE,
+                idempotency_key=idempotency_key or None,
+            )
+            enrollment._seat_taken = True  # counted above; signals.py mustn't count it again
+            enrollment.save()
+            return enrollment, True
+    except IntegrityError:
+        # A concurrent submit for the same user + course got there first. Our
+        # transaction (and its seat) rolled back; hand back the winner's row.
+        existing = Enrollment.objects.filter(student_user=user, course=course).first()
+        if existing is None:
+            raise
+        return existing, False
@@ -0,0 +1,151 @@
+import calendar
+from datetime import date
+from decimal import ROUND_DOWN, Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from . import placement, student_profiles
+from .models import Enrollment, FeePayment, Installment, Student
+
+# Monthly installments per payment mode; 'full' has no schedule
+PLANS = {'emi': 6, 'loan': 12}
+# FeePayment modes that count towards installments (the booking fee is
+# Enrollment.amount_paid, not part of the schedule)
+INSTALLMENT_MODES = ('EMI', 'LOAN')
+CHUNK_SIZE = 500
+
+
+# --- INSTALLMENT SCHEDULES ---
+#
+# An EMI / loan enrollment owes course.price - amount_paid (the booking fee),
+# split into PLANS[payment_mode] monthly installments, the first one a month
+# after enrolling. Schedules are written by signals.py when an enrollment is
+# created or approved, and by `reconcile_installments --backfill` for older
+# ones; writing one twice is a no-op (unique enrollment + number).
+#
+# Reconciliation settles a student's installments oldest first against the
+# sum of their EMI / LOAN FeePayments, so paying ahead covers later months
+# too. A student who falls behind has is_fee_paid cleared and fee_hold set;
+# once the overdue months are settled the flag is set again. Flags the
+# reconciler didn't clear (office decisions, full-payment dues, the booking
+# fee) are left as they are.
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def split(balance, count):
+    # `count` amounts adding up to balance; the last one takes the paise left over
+    share = (balance / count).quantize(Decimal('0.01'), rounding=ROUND_DOWN)
+    return [share] * (count - 1) + [balance - share * (count - 1)]
+
+
+def schedule(enrollment, student_id):
+    # Unsaved Installments for one enrollment ([] for full payment)
+    count = PLANS.get(enrollment.payment_mode)
+    balance = Decimal(enrollment.course.price) - Decimal(enrollment.amount_paid)
+    if not count or balance <= 0:
+        return []
+    start = timezone.localdate(enrollment.date_enrolled)
+    return [
+        Installment(
+            enrollment=enrollment, student_id=student_id, number=number,
+            due_date=_add_months(start, number), amount=amount,
+        )
+        for number, amount in enumerate(split(balance, count), start=1)
+    ]
+
+
+def generate(enrollments):
+    # Writes the schedules of the given enrollments (course loaded) in one
+    # bulk insert. Enrollments whose user has no Student profile yet are left
+    # for later (approval, --backfill). Returns the number of installments.
+    enrollments = [enrollment for enrollment in enrollments if enrollment.payment_mode in PLANS]
+    if not enrollments:
+        return 0
+    students = dict(
+        Student.objects.filter(user_id__in={enrollment.student_user_id for enrollment in enrollments})
+        .values_list('user_id', 'id')
+    )
+    rows = []
+    for enrollment in enrollments:
+        if enrollment.student_user_id in students:
+            rows += schedule(enrollment, students[enrollment.student_user_id])
+    Installment.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+    return len(rows)
+
+
+def missing_schedules():
+    # EMI / loan enrollments with no installments yet
+    return (
+        Enrollment.objects.filter(payment_mode__in=PLANS, installments__isnull=True)
+        .select_related('course').order_by('id')
+    )
+
+
+# --- DAILY RECONCILIATION (manage.py reconcile_installments) ---
+
+def due_students(today):
+    # Students whose installments can change today: pending ones that have
+    # fallen due, and overdue ones a payment may have settled since. Two
+    # index range scans on (status, due_date).
+    return list(
+        Installment.objects.filter(Q(status='pending', due_date__lt=today) | Q(status='overdue'))
+        .order_by('student_id').values_list('student_id', flat=True).distinct()
+    )
+
+
+def _reconcile_chunk(student_ids, today):
+    credit = dict(
+        FeePayment.objects.filter(student_id__in=student_ids, mode__in=INSTALLMENT_MODES)
+        .values('student_id').annotate(total=Sum('amount')).values_list('student_id', 'total')
+    )
+    changed, up_to_date, behind = [], set(), set()
+    installments = Installment.objects.filter(student_id__in=student_ids).order_by('student_id', 'due_date', 'number')
+    owed = {}
+    for installment in installments:
+        owed[installment.student_id] = owed.get(installment.student_id, 0) + installment.amount
+        if owed[installment.student_id] <= credit.get(installment.student_id, 0):
+            status = 'paid'
+        elif installment.due_date < today:
+            status = 'overdue'
+        else:
+            status = 'pending'
+
+        if status != installment.status:
+            installment.status = status
+            installment.paid_on = today if status == 'paid' else None
+            changed.append(installment)
+        (behind if status == 'overdue' else up_to_date).add(installment.student_id)
+
+    up_to_date -= behind
+    with transaction.atomic():
+        Installment.objects.bulk_update(changed, ['status', 'paid_on'], batch_size=500)
+        # Only rows whose flag actually flips, and only back to paid where the
+        # reconciler cleared it (fee_hold); queryset updates skip signals
+        held = list(Student.objects.filter(id__in=behind, is_fee_paid=True).values_list('id', flat=True))
+        released = list(Student.objects.filter(id__in=up_to_date, fee_hold=True).values_list('id', flat=True))
+        Student.objects.filter(id__in=held).update(is_fee_paid=False, fee_hold=True)
+        Student.objects.filter(id__in=released).update(is_fee_paid=True, fee_hold=False)
+        flipped = held + released
+        # Placement eligibility reads the archives, which can't be ATTACHed in here
+        placement.refresh_on_commit(*flipped)
+        student_profiles.forget_students(flipped)
+    return changed, flipped
+
+
+def reconcile(today=None):
+    # Returns {'students', 'paid', 'overdue', 'flags'} counts for the run
+    today = today or timezone.localdate()
+    student_ids = due_students(today)
+    totals = {'students': len(student_ids), 'paid': 0, 'overdue': 0, 'flags': 0}
+    for start in range(0, len(student_ids), CHUNK_SIZE):
+        changed, flipped = _reconcile_chunk(student_ids[start:start + CHUNK_SIZE], today)
+        totals['paid'] += sum(1 for installment in changed if installment.status == 'paid')
+        totals['overdue'] += sum(1 for installment in changed if installment.status == 'overdue')
+        totals['flags'] += len(flipped)
+    return totals
@@ -0,0 +1,182 @@
+import csv
+import io
+import threading
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import CumeDist, Rank
+
+from . import placement
+from .models import BatchRanking, ExamResult, Student, SubjectTopper
+
+# Marks at or above this count as a pass when an upload doesn't say
+PASS_MARK = 40
+
+
+# --- BATCH LEADERBOARD ---
+#
+# Students are ranked by total marks against the others in the same batch and
+# course. Rank, percentile and per-subject toppers come from window functions
+# (RANK / CUME_DIST partitioned by batch + course), so the database does the
+# ranking and Python only copies rows into BatchRanking / SubjectTopper.
+# refresh() rebuilds just the batches it's given; uploads and ExamResult
+# signals pass the batches their results touched.
+
+def _partition():
+    return [F('student__batch_id'), F('student__course_id')]
+
+
+def _rankings(batch_ids):
+    # One query: per-student totals with rank and cumulative distribution
+    return (
+        ExamResult.objects.filter(student__batch_id__in=batch_ids)
+        .values('student_id', 'student__batch_id', 'student__course_id')
+        .annotate(
+            total=Sum('marks'),
+            subjects=Count('id'),
+            subjects_passed=Count('id', filter=Q(passed=True)),
+        )
+        # Separate annotate(): ordering by F('total') keeps the windows out of GROUP BY
+        .annotate(
+            rank=Window(Rank(), partition_by=_partition(), order_by=F('total').desc()),
+            cume_dist=Window(CumeDist(), partition_by=_partition(), order_by=F('total').asc()),
+        )
+        .order_by()
+    )
+
+
+def _toppers(batch_ids):
+    # Best mark per subject in each batch + course; ties all count as toppers
+    return (
+        ExamResult.objects.filter(student__batch_id__in=batch_ids)
+        .annotate(subject_rank=Window(
+            Rank(), partition_by=_partition() + [F('subject')], order_by=F('marks').desc(),
+        ))
+        .filter(subject_rank=1)
+        .values('student_id', 'student__batch_id', 'student__course_id', 'subject', 'marks')
+    )
+
+
+def refresh(batch_ids):
+    batch_ids = {batch_id for batch_id in batch_ids if batch_id is not None}
+    if not batch_ids:
+        return 0
+
+    rankings = [
+        BatchRanking(
+            batch_id=row['student__batch_id'],
+            course_id=row['student__course_id'],
+            student_id=row['student_id'],
+            total_marks=row['total'],
+            subjects=row['subjects'],
+            subjects_passed=row['subjects_passed'],
+            rank=row['rank'],
+            percentile=round(row['cume_dist'] * 100, 2),
+        )
+        for row in _rankings(batch_ids)
+    ]
+    toppers = [
+        SubjectTopper(
+            batch_id=row['student__batch_id'],
+            course_id=row['student__course_id'],
+            subject=row['subject'],
+            student_id=row['student_id'],
+            marks=row['marks'],
+        )
+        for row in _toppers(batch_ids)
+    ]
+
+    with transaction.atomic():
+        # Students who moved batch still have a row under the old one; the
+        # student column is unique, so clear theirs too
+        BatchRanking.objects.filter(Q(batch_id__in=batch_ids) | Q(student_id__in=[r.student_id for r in rankings])).delete()
+        SubjectTopper.objects.filter(batch_id__in=batch_ids).delete()
+        BatchRanking.objects.bulk_create(rankings, batch_size=500)
+        SubjectTopper.objects.bulk_create(toppers, batch_size=500)
+    return len(rankings)
+
+
+# Results saved one at a time (admin, shell) refresh their batches once, when
+# the transaction commits, however many rows it touched: every save queues a
+# callback, the first one to run refreshes everything pending.
+_pending = threading.local()
+
+
+def _refresh_pending():
+    batch_ids = _pending.__dict__.pop('batch_ids', None)
+    if batch_ids:
+        refresh(batch_ids)
+
+
+def refresh_on_commit(*batch_ids):
+    _pending.__dict__.setdefault('batch_ids', set()).update(batch_ids)
+    transaction.on_commit(_refresh_pending)
+
+
+# --- BULK UPLOAD ---
+#
+# CSV with a header row: student_id, subject, marks[, passed]
+# A row for a student + subject that already has a result replaces its marks.
+
+class UploadError(ValueError):
+    pass
+
+
+def parse_csv(text):
+    reader = csv.DictReader(io.StringIO(text))
+    missing = {'student_id', 'subject', 'marks'} - set(reader.fieldnames or [])
+    if missing:
+        raise UploadError(f"Missing column(s): {', '.join(sorted(missing))}")
+
+    rows = []
+    for line, row in enumerate(reader, start=2):
+        try:
+            marks = int(row['marks'])
+        except (TypeError, ValueError):
+            raise UploadError(f"Line {line}: marks must be a whole number")
+        passed = (row.get('passed') or '').strip().lower()
+        rows.append({
+            'student_id': row['student_id'].strip(),
+            'subject': row['subject'].strip(),
+            'marks': marks,
+            'passed': passed in ('1', 'true', 'yes', 'y', 'pass') if passed else marks >= PASS_MARK,
+        })
+    return rows
+
+
+def import_results(rows):
+    # Returns (created, updated, batches refreshed). Unknown student ids raise
+    # UploadError and nothing is saved.
+    codes = {row['student_id'] for row in rows}
+    students = dict(Student.objects.filter(student_id__in=codes).values_list('student_id', 'id'))
+    unknown = codes - students.keys()
+    if unknown:
+        raise UploadError(f"Unknown student id(s): {', '.join(sorted(unknown)[:10])}")
+
+    existing = {
+        (result.student_id, result.subject): result
+        for result in ExamResult.objects.filter(student_id__in=students.values(), subject__in={row['subject'] for row in rows})
+    }
+    to_create, to_update = [], {}
+    for row in rows:
+        key = (students[row['student_id']], row['subject'])
+        if key in existing:
+            # Last row wins when a file lists the same result twice
+            result = existing[key]
+            result.marks, result.passed = row['marks'], row['passed']
+            if result.pk is not None:
+                to_update[result.pk] = result
+        else:
+            result = ExamResult(student_id=key[0], subject=key[1], marks=row['marks'], passed=row['passed'])
+            existing[key] = result
+            to_create.append(result)
+
+    batch_ids = set(Student.objects.filter(id__in=students.values()).values_list('batch_id', flat=True))
+    # bulk_* skip the per-row signals; refresh the touched batches once, here,
+    # and the students' placement eligibility after the commit
+    with transaction.atomic():
+        ExamResult.objects.bulk_create(to_create, batch_size=500)
+        ExamResult.objects.bulk_update(to_update.values(), ['marks', 'passed'], batch_size=500)
+        refresh(batch_ids)
+        placement.refresh_on_commit(*students.values())
+    return len(to_create), len(to_update), len(batch_ids - {None})
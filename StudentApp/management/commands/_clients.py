@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.utils.module_loading import import_string
+
+
+# Helpers shared by the bench commands (Django skips modules starting with "_"
+# when listing commands).
+
+def allowed_host():
+    # A Host header ALLOWED_HOSTS accepts, for the bench commands' test Client
+    # (its default "testserver" only passes under the test runner); with DEBUG
+    # and no ALLOWED_HOSTS, localhost
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def login_session(user):
+    # Key of a new session logged in as `user`, without going through the login form
+    store = import_string(settings.SESSION_ENGINE + '.SessionStore')
+    session = store()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
@@ -0,0 +1,105 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from StudentApp import attendance_history as history
+from StudentApp.models import Attendance
+
+
+# Moves closed academic years out of the Attendance table into one SQLite file
+# per year (see attendance_history.py), a chunk at a time so the write lock is
+# only ever held briefly. Safe to stop and re-run: each chunk is copied and
+# deleted in one transaction, and re-copying an id just replaces it.
+#
+#   python manage.py archive_attendance                  # every closed year
+#   python manage.py archive_attendance --year 2023 --chunk-size 2000
+#
+# Rows are moved with plain SQL, so the TrainerApp change log does not see them
+# as deletions - archiving isn't an attendance change.
+class Command(BaseCommand):
+    help = 'Archive attendance for closed academic years into per-year SQLite files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, action='append', help='Academic year to archive (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between chunks')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Attendance archiving needs the SQLite backend.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        current = history.academic_year(timezone.localdate())
+        years = options['year'] or self._closed_years(current)
+        for year in years:
+            if year >= current:
+                raise CommandError(f'{year} is the current academic year (or later); only closed years can be archived.')
+
+        if not years:
+            self.stdout.write('Nothing to archive.')
+            return
+
+        for year in years:
+            start, end = history.academic_year_range(year)
+            pending = Attendance.objects.filter(date__gte=start, date__lt=end).count()
+            if not pending:
+                # No file for a year with nothing in it: every archive file
+                # costs history queries an ATTACH
+                self.stdout.write(f'{year}: nothing to move')
+                continue
+            if options['dry_run']:
+                self.stdout.write(f'{year}: would move {pending} row(s) to {history.archive_path(year)}')
+                continue
+            moved = self._archive_year(year, start, end, options['chunk_size'], options['pause'])
+            self.stdout.write(self.style.SUCCESS(f'{year}: moved {moved} row(s) to {history.archive_path(year)}'))
+
+    def _closed_years(self, current):
+        # Only years that still have rows; a gap year (no classes) is skipped
+        first = Attendance.objects.aggregate(first=Min('date'))['first']
+        if first is None:
+            return []
+        years = []
+        for year in range(history.academic_year(first), current):
+            start, end = history.academic_year_range(year)
+            if Attendance.objects.filter(date__gte=start, date__lt=end).exists():
+                years.append(year)
+        return years
+
+    def _archive_year(self, year, start, end, chunk_size, pause):
+        schema = history.attach(year, create=True)
+        live = f'"{history.LIVE_TABLE}"'
+        columns = ', '.join(history.COLUMNS)
+        moved = 0
+
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT COUNT(*), MAX(id) FROM (SELECT id FROM {live} '
+                    f'WHERE date >= %s AND date < %s ORDER BY id LIMIT %s)',
+                    [str(start), str(end), chunk_size],
+                )
+                count, last_id = cursor.fetchone()
+                if not count:
+                    break
+                # The chunk is exactly the year's rows with id <= last_id
+                chunk = 'date >= %s AND date < %s AND id <= %s'
+                params = [str(start), str(end), last_id]
+                cursor.execute(
+                    f'INSERT OR REPLACE INTO {schema}.{history.ARCHIVE_TABLE} ({columns}) '
+                    f'SELECT {columns} FROM {live} WHERE {chunk}',
+                    params,
+                )
+                cursor.execute(f'DELETE FROM {live} WHERE {chunk}', params)
+
+            moved += count
+            self.stdout.write(f'  {year}: {moved} row(s) moved', ending='\r')
+            # Let web requests get at the write lock between chunks
+            time.sleep(pause)
+
+        self.stdout.write('')
+        return moved
@@ -0,0 +1,168 @@
+import statistics
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Count, Q
+
+from StudentApp import attendance_bitmap, attendance_history
+from StudentApp.models import Attendance, AttendanceMonth, Student
+
+CHUNK_SIZE = 500
+
+
+# Moves attendance onto the packed per-month table (AttendanceMonth, see
+# StudentApp/attendance_bitmap.py) and measures what that buys.
+#
+#   python manage.py attendance_bitmap migrate    # fill it from live + archived rows
+#   python manage.py attendance_bitmap verify     # per-student totals must match the rows
+#   python manage.py attendance_bitmap bench [--batch B1 --repeat 20]
+#
+# migrate rewrites each student's months from scratch, so it can be re-run at
+# any time; turn ATTENDANCE_BITMAP_MIRROR on first so nothing marked while it
+# runs is missed.
+class Command(BaseCommand):
+    help = 'Packed attendance bitmaps: migrate, verify, bench'
+
+    def add_arguments(self, parser):
+        sub = parser.add_subparsers(dest='action', required=True)
+        sub.add_parser('migrate', help='Rebuild AttendanceMonth from the attendance rows')
+        sub.add_parser('verify', help='Compare per-student totals between rows and bitmaps')
+        bench = sub.add_parser('bench', help='Compare storage size and read times with the row table')
+        bench.add_argument('--batch', help='Batch name for the register report (default: the largest)')
+        bench.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        getattr(self, f"_{options['action']}")(options)
+
+    def _student_chunks(self):
+        ids = list(Student.objects.order_by('id').values_list('id', flat=True))
+        for start in range(0, len(ids), CHUNK_SIZE):
+            yield ids[start:start + CHUNK_SIZE], len(ids)
+
+    # --- migrate ---
+    def _migrate(self, options):
+        started = time.perf_counter()
+        students = months = 0
+        for chunk, total in self._student_chunks():
+            months += attendance_bitmap.rebuild_students(chunk, attendance_history.student_rows(chunk))
+            students += len(chunk)
+            self.stdout.write(f'  {students}/{total} student(s)', ending='\r')
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f'{months} month row(s) for {students} student(s) in {time.perf_counter() - started:.1f}s'
+        ))
+
+    # --- verify ---
+    def _verify(self, options):
+        checked, mismatched = 0, []
+        for chunk, _ in self._student_chunks():
+            rows = attendance_history.counts_by_student(chunk)
+            packed = {}
+            for student_id, bits in AttendanceMonth.objects.filter(student_id__in=chunk).values_list('student_id', 'bits'):
+                marked, present, _, _ = attendance_bitmap.lanes(bits)
+                days, present_days = packed.get(student_id, (0, 0))
+                packed[student_id] = (days + marked.bit_count(), present_days + present.bit_count())
+            for student_id in chunk:
+                if tuple(rows.get(student_id, (0, 0))) != packed.get(student_id, (0, 0)):
+                    mismatched.append(student_id)
+            checked += len(chunk)
+
+        if mismatched:
+            raise CommandError(
+                f"{len(mismatched)} of {checked} student(s) differ, e.g. id(s) {', '.join(map(str, mismatched[:10]))}; "
+                f"run `attendance_bitmap migrate`"
+            )
+        self.stdout.write(self.style.SUCCESS(f'OK: {checked} student(s) match'))
+
+    # --- bench ---
+    def _bench(self, options):
+        if not AttendanceMonth.objects.exists():
+            raise CommandError('AttendanceMonth is empty; run `attendance_bitmap migrate` first.')
+        repeat = max(options['repeat'], 1)
+
+        for label, model in (('rows', Attendance), ('bitmap', AttendanceMonth)):
+            count = model.objects.count()
+            size = self._table_size(model._meta.db_table)
+            size = f'{size / 1024 / 1024:.1f} MiB' if size is not None else 'size n/a (no dbstat)'
+            self.stdout.write(f'{label:>7}: {count} row(s), {size} with indexes')
+
+        # The busiest month, and the student with the most history
+        month = (
+            AttendanceMonth.objects.values('month').annotate(n=Count('id')).order_by('-n')
+            .values_list('month', flat=True).first()
+        )
+        student_id = (
+            AttendanceMonth.objects.values('student_id').annotate(n=Count('id')).order_by('-n')
+            .values_list('student_id', flat=True).first()
+        )
+        next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        in_month = Q(date__gte=month, date__lt=next_month)
+
+        students = Student.objects.filter(batch__isnull=False)
+        if options['batch']:
+            students = students.filter(batch__name=options['batch'])
+        batch_id = students.values('batch_id').annotate(n=Count('id')).order_by('-n').values_list('batch_id', flat=True).first()
+        if batch_id is None:
+            raise CommandError('No batch to report on.')
+        batch = Student.objects.filter(batch_id=batch_id)
+
+        def month_rows():
+            present = Count('id', filter=Q(status='Present'))
+            return Attendance.objects.filter(in_month, student_id=student_id).aggregate(days=Count('id'), present=present)
+
+        def report_rows():
+            rows = (
+                Attendance.objects.filter(in_month, student__batch_id=batch_id).values('student_id')
+                .annotate(days=Count('id'), present=Count('id', filter=Q(status='Present')))
+            )
+            return {row['student_id']: (row['days'], row['present']) for row in rows}
+
+        def streak_rows():
+            # Oldest first over live + archived rows, counting runs of Present
+            records = attendance_history.student_records(student_id)
+            current = longest = 0
+            for record in reversed(records):
+                if record.status == 'Present':
+                    current += 1
+                    longest = max(longest, current)
+                else:
+                    current = 0
+            return current, longest
+
+        cases = [
+            (f'month % (1 student, {month:%Y-%m})', month_rows, lambda: attendance_bitmap.month_summary(student_id, month)),
+            (f'register ({batch.count()} students)', report_rows, lambda: attendance_bitmap.month_report(batch, month)),
+            ('streaks (full history)', streak_rows, lambda: attendance_bitmap.streaks(student_id)),
+        ]
+        self.stdout.write(f"{'':32} {'rows':>10} {'bitmap':>10}")
+        for label, with_rows, with_bitmap in cases:
+            row_ms, bitmap_ms = self._median_ms(with_rows, repeat), self._median_ms(with_bitmap, repeat)
+            self.stdout.write(f'{label:32} {row_ms:>8.2f}ms {bitmap_ms:>8.2f}ms  x{row_ms / bitmap_ms:.1f}')
+
+        if streak_rows() != attendance_bitmap.streaks(student_id):
+            raise CommandError('Streaks differ between rows and bitmap; run `attendance_bitmap verify`')
+
+    def _median_ms(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def _table_size(self, table):
+        # Bytes in the table and its indexes, from SQLite's dbstat virtual table
+        if connection.vendor != 'sqlite':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA index_list("{table}")')
+            names = [table] + [row[1] for row in cursor.fetchall()]
+            try:
+                cursor.execute(
+                    f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({', '.join(['%s'] * len(names))})", names,
+                )
+            except OperationalError:
+                return None
+            return cursor.fetchone()[0]
@@ -0,0 +1,74 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from ._clients import allowed_host
+
+
+# Payload size and latency of the JSON API against the HTML page the mobile
+# app scrapes for the same data today.
+#
+#   python manage.py bench_api --username STU-1001 --repeat 50
+#
+# "wire" is what was actually sent (the API compresses, the HTML pages don't).
+PAIRS = [
+    ('courses', '/api/courses/', '/courses/'),
+    ('attendance', '/api/attendance/?fields=date,status&limit=200', '/attendance/my-stats/'),
+    ('leaves', '/api/leaves/', '/apply-leave/'),
+    ('profile', '/api/students/', '/profile/'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare the JSON API with the HTML pages: payload size and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='Student account to fetch the pages as')
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--encoding', default='gzip, br', help='Accept-Encoding sent by the client')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}")
+
+        client = Client(HTTP_HOST=allowed_host(), HTTP_ACCEPT_ENCODING=options['encoding'])
+        client.force_login(user)
+
+        self.stdout.write(f"{'page':<12}{'kind':<6}{'status':>7}{'wire B':>10}{'raw B':>10}{'p50 ms':>9}{'p95 ms':>9}")
+        for name, api_url, html_url in PAIRS:
+            for kind, url in (('api', api_url), ('html', html_url)):
+                status, wire, raw, timings = self._measure(client, url, options['repeat'])
+                p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+                self.stdout.write(
+                    f"{name:<12}{kind:<6}{status:>7}{wire:>10}{raw:>10}"
+                    f"{statistics.median(timings) * 1000:>9.2f}{p95 * 1000:>9.2f}"
+                )
+
+    def _measure(self, client, url, repeat):
+        timings = []
+        response = None
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - start
+            # Timing an error page (DisallowedHost, a login redirect) says nothing about the view
+            if response.status_code != 200:
+                raise CommandError(f'GET {url} returned {response.status_code}, expected 200')
+            timings.append(elapsed)
+        timings.sort()
+
+        wire = len(response.content)
+        raw = wire
+        encoding = response.get('Content-Encoding')
+        if encoding == 'gzip':
+            import gzip
+            raw = len(gzip.decompress(response.content))
+        elif encoding == 'br':
+            import brotli
+            raw = len(brotli.decompress(response.content))
+        return response.status_code, wire, raw, timings
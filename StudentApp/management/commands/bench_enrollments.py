@@ -0,0 +1,148 @@
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from StudentApp.models import Course, Enrollment
+
+from ._clients import allowed_host, login_session
+
+
+# Admission-day load test for enroll_course: many users submit the enrollment
+# form at the same moment, each one several times (double-click with the same
+# form, plus a second tab with a fresh form), against a course with fewer seats
+# than users. Checks afterwards that
+#   - every user has at most one enrollment and resubmits got the same one back,
+#   - Course.seats_taken equals the number of enrollments and never passes seat_capacity,
+#   - no submit failed (e.g. "database is locked").
+#
+#   python manage.py bench_enrollments --users 300 --capacity 200 --threads 64
+#
+# Works on throwaway users and a throwaway course in the configured database,
+# deleted again at the end (unless --keep); point it at a copy rather than the
+# live db.sqlite3. Exits non-zero when a check fails. StudentApp/tests.py runs
+# the same checks on a small scale against the test database.
+class Command(BaseCommand):
+    help = 'Submit enrollments concurrently and check seat counts and idempotency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--capacity', type=int, default=150, help='Seats in the test course')
+        parser.add_argument('--threads', type=int, default=64, help='Simultaneous submits')
+        parser.add_argument('--keep', action='store_true', help="Don't delete the test users and course")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['threads'] < 1 or options['capacity'] < 0:
+            raise CommandError('--users and --threads must be positive, --capacity not negative')
+
+        tag = f'bench-enroll-{uuid.uuid4().hex[:8]}'
+        course = Course.objects.create(name=tag, price=20000, description=tag, seat_capacity=options['capacity'])
+        users = [User(username=f'{tag}-{i}') for i in range(options['users'])]
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(username__startswith=f'{tag}-'))
+        cookies = {user.id: login_session(user) for user in users}
+
+        try:
+            self._run(course, users, cookies, options)
+        finally:
+            if not options['keep']:
+                store = import_string(settings.SESSION_ENGINE + '.SessionStore')
+                for session_key in cookies.values():
+                    store(session_key).delete()
+                User.objects.filter(username__startswith=f'{tag}-').delete()
+                course.delete()
+
+    def _run(self, course, users, cookies, options):
+        url = reverse('enroll_course', args=[course.id])
+
+        # Per user: the same form twice (double-click) and a second form with its own key
+        jobs = []
+        for user in users:
+            double_click = uuid.uuid4().hex
+            jobs += [(user.id, double_click), (user.id, double_click), (user.id, uuid.uuid4().hex)]
+        random.shuffle(jobs)
+
+        # The first wave of submits all start at the same instant
+        start_line = threading.Barrier(min(options['threads'], len(jobs)))
+
+        def submit(numbered_job):
+            index, (user_id, key) = numbered_job
+            client = Client(HTTP_HOST=allowed_host())
+            client.cookies[settings.SESSION_COOKIE_NAME] = cookies[user_id]
+            if index < start_line.parties:
+                start_line.wait()
+            started = time.perf_counter()
+            try:
+                response = client.post(url, {
+                    'payment_mode': random.choice(['full', 'emi', 'loan']),
+                    'phone': '9000000000', 'address': 'Bench', 'gender': 'M',
+                    'idempotency_key': key,
+                })
+                return user_id, key, response.status_code, response.get('Location'), time.perf_counter() - started, None
+            except Exception as exc:
+                return user_id, key, None, None, time.perf_counter() - started, exc
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            results = list(pool.map(submit, enumerate(jobs)))
+        elapsed = time.perf_counter() - started
+
+        errors = [result for result in results if result[5] is not None or result[2] not in (200, 302)]
+        if len(errors) == len(results):
+            sample = errors[0]
+            raise CommandError(
+                f'Every submit failed (e.g. status {sample[2]} {sample[5]!r}); nothing was benchmarked. '
+                f'Is {allowed_host()!r} in ALLOWED_HOSTS?'
+            )
+        redirects = {}
+        for user_id, key, status, location, _, _ in results:
+            if status == 302:
+                redirects.setdefault(user_id, set()).add(location)
+
+        course.refresh_from_db()
+        enrolled = Enrollment.objects.filter(course=course).count()
+        per_user = Enrollment.objects.filter(course=course).values('student_user').annotate(n=Count('id'))
+        doubled = [row for row in per_user if row['n'] > 1]
+        # A user's submits must all land on the same enrollment
+        split = [user_id for user_id, locations in redirects.items() if len(locations) > 1]
+
+        latencies = sorted(result[4] for result in results)
+        self.stdout.write(
+            f"{len(jobs)} submits from {len(users)} users on {options['threads']} threads in {elapsed:.2f}s "
+            f"({len(jobs) / elapsed:.0f}/s, p50 {statistics.median(latencies) * 1000:.0f} ms, "
+            f"max {latencies[-1] * 1000:.0f} ms)"
+        )
+        self.stdout.write(
+            f"enrollments {enrolled}, seats_taken {course.seats_taken}, capacity {course.seat_capacity}, "
+            f"users turned away {len(users) - len(redirects)}"
+        )
+
+        problems = []
+        if errors:
+            sample = errors[0]
+            problems.append(f'{len(errors)} submit(s) failed, e.g. status {sample[2]} {sample[5]!r}')
+        if course.seats_taken != enrolled:
+            problems.append(f'seats_taken {course.seats_taken} != {enrolled} enrollments')
+        if enrolled != min(len(users), course.seat_capacity):
+            problems.append(f'expected {min(len(users), course.seat_capacity)} enrollments, got {enrolled}')
+        if doubled:
+            problems.append(f'{len(doubled)} user(s) enrolled more than once')
+        if split:
+            problems.append(f'{len(split)} user(s) redirected to different enrollments')
+
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS('OK: one enrollment per user, seat count exact, no failed submits'))
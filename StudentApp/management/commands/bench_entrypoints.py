@@ -0,0 +1,190 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ._clients import allowed_host, login_session
+
+
+# Compares throughput of the same URL served through Studylab/asgi.py and
+# Studylab/wsgi.py with many simultaneous clients.
+#
+#   python manage.py bench_entrypoints --path /courses/ --clients 300 --requests 3000
+#   python manage.py bench_entrypoints --path /dashboard/ --username STU-1001
+#
+# ASGI clients all share one event loop; WSGI clients queue for a fixed number
+# of worker threads (--wsgi-threads), like a threaded WSGI server would. Latency
+# includes the time spent waiting for a free worker in both cases.
+#
+# Any status other than --expect (200) counts as an error and fails the run, so
+# a login redirect or a DisallowedHost 400 isn't benchmarked by mistake.
+class Command(BaseCommand):
+    help = 'Benchmark ASGI vs WSGI entry points with many concurrent clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/courses/')
+        parser.add_argument('--clients', type=int, default=200, help='Simultaneous clients')
+        parser.add_argument('--requests', type=int, default=2000, help='Total requests per entry point')
+        parser.add_argument('--wsgi-threads', type=int, default=8, help='Worker threads for the WSGI run')
+        parser.add_argument('--username', help='Log this user in first (needed for dashboard / my-stats)')
+        parser.add_argument('--host', help='Host header (default: one ALLOWED_HOSTS accepts)')
+        parser.add_argument('--expect', type=int, default=200, help='Status code every response must have')
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['requests'] < 1:
+            raise CommandError('--clients and --requests must be positive')
+
+        options['host'] = options['host'] or allowed_host()
+        cookie = self._session_cookie(options['username']) if options['username'] else ''
+
+        # Import lazily so both applications are built against the current settings.
+        from Studylab.asgi import application as asgi_app
+        from Studylab.wsgi import application as wsgi_app
+
+        results = [
+            ('WSGI', self._run_wsgi(wsgi_app, options, cookie)),
+            ('ASGI', self._run_asgi(asgi_app, options, cookie)),
+        ]
+
+        self.stdout.write(f"{options['path']}  clients={options['clients']}  requests={options['requests']}")
+        self.stdout.write(f"{'entry':<6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'errors':>8}")
+        for name, (elapsed, latencies, errors, _) in results:
+            latencies.sort()
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+            self.stdout.write(
+                f"{name:<6}{len(latencies) / elapsed:>10.1f}"
+                f"{statistics.median(latencies) * 1000:>10.1f}"
+                f"{p95 * 1000:>10.1f}"
+                f"{latencies[-1] * 1000:>10.1f}"
+                f"{errors:>8}"
+            )
+
+        unexpected = next((status for _, (_, _, _, status) in results if status is not None), None)
+        if unexpected is not None:
+            hint = ' (a login redirect? pass --username)' if 300 <= unexpected < 400 else ''
+            raise CommandError(
+                f"Responses other than {options['expect']}, e.g. {unexpected}{hint}; the numbers above are not the view's"
+            )
+
+    def _session_cookie(self, username):
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {username!r}')
+
+        return f'{settings.SESSION_COOKIE_NAME}={login_session(user)}'
+
+    def _summary(self, elapsed, batches, expect):
+        # (elapsed, latencies, error count, first unexpected status or None)
+        samples = [sample for batch in batches for sample in batch]
+        wrong = [status for _, status in samples if status != expect]
+        return elapsed, [latency for latency, _ in samples], len(wrong), wrong[0] if wrong else None
+
+    def _split(self, options):
+        # Spread the total request count over the clients.
+        per_client, extra = divmod(options['requests'], options['clients'])
+        return [per_client + (1 if i < extra else 0) for i in range(options['clients'])]
+
+    # --- WSGI: every client is a thread, only --wsgi-threads of them run the app at once ---
+    def _run_wsgi(self, app, options, cookie):
+        path, host = options['path'], options['host']
+        workers = threading.BoundedSemaphore(options['wsgi_threads'])
+
+        def one_request():
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'SERVER_NAME': host,
+                'SERVER_PORT': '80',
+                'HTTP_HOST': host,
+                'HTTP_COOKIE': cookie,
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'wsgi.version': (1, 0),
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': BytesIO(),
+                'wsgi.errors': BytesIO(),
+                'wsgi.multithread': True,
+                'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            status = []
+            start = time.perf_counter()
+            with workers:
+                body = app(environ, lambda s, headers, exc_info=None: status.append(s))
+                for _ in body:
+                    pass
+                if hasattr(body, 'close'):
+                    body.close()
+            return time.perf_counter() - start, int(status[0].split()[0])
+
+        def client(count):
+            return [one_request() for _ in range(count)]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['clients']) as pool:
+            batches = list(pool.map(client, self._split(options)))
+        elapsed = time.perf_counter() - start
+
+        return self._summary(elapsed, batches, options['expect'])
+
+    # --- ASGI: every client is a coroutine on the same loop ---
+    def _run_asgi(self, app, options, cookie):
+        path, host = options['path'], options['host']
+        headers = [(b'host', host.encode())]
+        if cookie:
+            headers.append((b'cookie', cookie.encode()))
+
+        async def one_request():
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'query_string': b'',
+                'root_path': '',
+                'headers': headers,
+                'client': ('127.0.0.1', 50000),
+                'server': (host, 80),
+            }
+            status = []
+            body_sent = asyncio.Event()
+            response_done = asyncio.Event()
+
+            async def receive():
+                # Hand over the (empty) body once, then stay connected until the response is sent.
+                if not body_sent.is_set():
+                    body_sent.set()
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await response_done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                    response_done.set()
+
+            start = time.perf_counter()
+            await app(scope, receive, send)
+            return time.perf_counter() - start, status[0]
+
+        async def client(count):
+            return [await one_request() for _ in range(count)]
+
+        async def main():
+            start = time.perf_counter()
+            batches = await asyncio.gather(*(client(n) for n in self._split(options)))
+            return time.perf_counter() - start, batches
+
+        elapsed, batches = asyncio.run(main())
+        return self._summary(elapsed, batches, options['expect'])
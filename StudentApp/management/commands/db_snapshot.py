@@ -0,0 +1,388 @@
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from StudentApp import attendance_history
+from StudentApp.models import Attendance, Student
+
+
+# Online snapshots of the SQLite database through SQLite's backup API,
+# so nobody has to copy db.sqlite3 while the site is running.
+#
+#   python manage.py db_snapshot create [--pages 256 --pause 0.01 --keep 7]
+#   python manage.py db_snapshot list
+#   python manage.py db_snapshot verify [snapshot-20251220-010000.sqlite3.gz]
+#   python manage.py db_snapshot restore snapshot-20251220-010000.sqlite3.gz
+#   python manage.py db_snapshot bench [--writers 4 --seconds 5]
+#
+# The backup copies --pages pages per step and sleeps --pause between steps.
+# Each step only holds a short read lock on the live file, never the write
+# lock, so writers are delayed by at most one step. A write from another
+# connection makes SQLite restart the copy, and a step can find the file locked
+# by a writer; after --max-restarts of either, the step is made 4x bigger (up to
+# one step for the whole file) so a busy database still finishes.
+# Snapshots are integrity-checked, gzipped, stored with their SHA-256 and
+# rotated (--keep newest).
+#
+# The yearly attendance archives (ATTENDANCE_ARCHIVE_DIR, attendance_history.py)
+# are part of the data, so each one is copied the same way into the snapshot's
+# .archive directory, after the main database: a year archived mid-snapshot
+# then shows up in both rather than in neither, and re-running
+# archive_attendance for it clears the duplicate. Verify and restore refuse a
+# file whose .sha256 is missing.
+
+SNAPSHOT_PREFIX = 'snapshot-'
+SNAPSHOT_SUFFIX = '.sqlite3.gz'
+
+
+SQLITE_BUSY, SQLITE_LOCKED = 5, 6
+
+
+class _TooMuchContention(Exception):
+    pass
+
+
+def _online_copy(source, target, pages, pause, max_restarts):
+    # Copies source -> target (both sqlite3 connections). Returns (steps, restarts, final pages per step).
+    # "restarts" counts both copies restarted by a write and steps that found the file locked.
+    while True:
+        state = {'steps': 0, 'restarts': 0, 'last': None}
+
+        def progress(status, remaining, total):
+            state['steps'] += 1
+            restarted = state['last'] is not None and remaining > state['last']
+            if status in (SQLITE_BUSY, SQLITE_LOCKED) or restarted:
+                state['restarts'] += 1
+                if pages > 0 and state['restarts'] > max_restarts:
+                    raise _TooMuchContention
+            state['last'] = remaining
+            if pause and remaining:
+                time.sleep(pause)
+
+        try:
+            # sleep: how long to back off when a writer holds the file
+            source.backup(target, pages=pages, progress=progress, sleep=max(pause, 0.001))
+            return state['steps'], state['restarts'], pages
+        except _TooMuchContention:
+            pages = pages * 4 if pages * 4 < 1_000_000 else -1
+
+
+def _integrity_check(path):
+    conn = sqlite3.connect(path)
+    try:
+        result = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+    finally:
+        conn.close()
+    return result == ['ok'], result
+
+
+def _archive_dir(snapshot):
+    # snapshot-<time>.sqlite3.gz -> snapshot-<time>.archive/attendance_<year>.sqlite3.gz
+    return snapshot.with_name(snapshot.name[:-len(SNAPSHOT_SUFFIX)] + '.archive')
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = 'Online SQLite snapshots: create, list, verify, restore, bench'
+
+    def add_arguments(self, parser):
+        sub = parser.add_subparsers(dest='action', required=True)
+
+        create = sub.add_parser('create', help='Take a snapshot of the live database')
+        self._pacing_arguments(create)
+        create.add_argument('--keep', type=int, default=7, help='Snapshots to keep (oldest are deleted)')
+
+        sub.add_parser('list', help='List snapshots, newest first')
+
+        verify = sub.add_parser('verify', help='Check checksums and run PRAGMA integrity_check')
+        verify.add_argument('name', nargs='?', help='Snapshot file (default: all)')
+
+        restore = sub.add_parser('restore', help='Restore a snapshot into the live database')
+        restore.add_argument('name')
+        restore.add_argument('--noinput', '--no-input', action='store_false', dest='interactive')
+
+        bench = sub.add_parser('bench', help='Measure write latency on a scratch copy while a snapshot runs')
+        self._pacing_arguments(bench)
+        bench.add_argument('--writers', type=int, default=4)
+        bench.add_argument('--seconds', type=float, default=3, help='Length of the baseline write run')
+
+    def _pacing_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=256, help='Pages copied per step (-1: all in one step)')
+        parser.add_argument('--pause', type=float, default=0.01, help='Seconds to sleep between steps')
+        parser.add_argument('--max-restarts', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('db_snapshot only works with the SQLite backend.')
+        self.db_path = Path(settings.DATABASES['default']['NAME'])
+        self.snapshot_dir = Path(settings.DB_SNAPSHOT_DIR)
+        getattr(self, f"_{options['action']}")(options)
+
+    # --- create ---
+    def _create(self, options):
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{SNAPSHOT_PREFIX}{timezone.now():%Y%m%d-%H%M%S}{SNAPSHOT_SUFFIX}"
+        target = self.snapshot_dir / name
+
+        started = time.perf_counter()
+        years = attendance_history.archive_years()
+        try:
+            steps, restarts, pages = self._snapshot_to(self.db_path, target, options)
+            for year in years:
+                _archive_dir(target).mkdir(exist_ok=True)
+                archive = _archive_dir(target) / f'attendance_{year}{SNAPSHOT_SUFFIX}'
+                self._snapshot_to(attendance_history.archive_path(year), archive, options)
+        except BaseException:
+            # No snapshot rather than one missing some of its archives
+            self._delete(target)
+            raise
+        elapsed = time.perf_counter() - started
+
+        size = sum(path.stat().st_size for path in [target, *self._archives(target)])
+        self.stdout.write(self.style.SUCCESS(
+            f'{name}: {size / 1024:.0f} KiB with {len(years)} attendance archive(s) in {elapsed:.2f}s '
+            f'(main database: {steps} steps, {restarts} restarts, final step {pages} pages)'
+        ))
+        self._rotate(options['keep'])
+
+    def _snapshot_to(self, source_path, target, options):
+        # Backup into a temp file next to the snapshots, check it, then compress
+        with tempfile.TemporaryDirectory(dir=self.snapshot_dir) as tmp:
+            raw = Path(tmp) / 'snapshot.sqlite3'
+            # timeout=0: a locked step returns straight away and is retried after
+            # `pause`, instead of queueing behind writers in SQLite's busy handler
+            source = sqlite3.connect(source_path, timeout=0)
+            dest = sqlite3.connect(raw)
+            try:
+                steps, restarts, pages = _online_copy(
+                    source, dest, options['pages'], options['pause'], options['max_restarts'],
+                )
+            finally:
+                dest.close()
+                source.close()
+
+            ok, problems = _integrity_check(raw)
+            if not ok:
+                raise CommandError(f"Snapshot failed integrity_check: {'; '.join(problems[:5])}")
+
+            partial = target.with_name(target.name + '.part')
+            with open(raw, 'rb') as src, gzip.open(partial, 'wb', compresslevel=6) as out:
+                shutil.copyfileobj(src, out, 1024 * 1024)
+            Path(str(target) + '.sha256').write_text(_sha256(raw) + '\n')
+            os.replace(partial, target)
+        return steps, restarts, pages
+
+    def _snapshots(self):
+        if not self.snapshot_dir.is_dir():
+            return []
+        return sorted(self.snapshot_dir.glob(f'{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}'), reverse=True)
+
+    def _archives(self, snapshot):
+        folder = _archive_dir(snapshot)
+        if not folder.is_dir():
+            return []
+        return sorted(folder.glob(f'attendance_*{SNAPSHOT_SUFFIX}'))
+
+    def _delete(self, snapshot):
+        snapshot.unlink(missing_ok=True)
+        Path(str(snapshot) + '.sha256').unlink(missing_ok=True)
+        shutil.rmtree(_archive_dir(snapshot), ignore_errors=True)
+
+    def _rotate(self, keep):
+        for old in self._snapshots()[max(keep, 1):]:
+            self._delete(old)
+            self.stdout.write(f'Removed old snapshot {old.name}')
+
+    # --- list ---
+    def _list(self, options):
+        snapshots = self._snapshots()
+        if not snapshots:
+            self.stdout.write('No snapshots yet.')
+        for path in snapshots:
+            archives = self._archives(path)
+            size = sum(part.stat().st_size for part in [path, *archives])
+            self.stdout.write(f'{path.name}  {size / 1024:10.0f} KiB  {len(archives)} attendance archive(s)')
+
+    # --- verify ---
+    def _resolve(self, name):
+        path = self.snapshot_dir / name
+        if not path.is_file():
+            raise CommandError(f'No snapshot {name} in {self.snapshot_dir}')
+        return path
+
+    def _unpack_verified(self, path, tmp):
+        # Decompress into tmp, then check it against its .sha256 and integrity_check
+        checksum_file = Path(str(path) + '.sha256')
+        if not checksum_file.is_file():
+            raise CommandError(f'{path.name}: no {checksum_file.name}, cannot verify it')
+        raw = Path(tmp) / path.name[:-len('.gz')]
+        with gzip.open(path, 'rb') as src, open(raw, 'wb') as out:
+            shutil.copyfileobj(src, out, 1024 * 1024)
+
+        if checksum_file.read_text().strip() != _sha256(raw):
+            raise CommandError(f'{path.name}: checksum mismatch')
+        ok, problems = _integrity_check(raw)
+        if not ok:
+            raise CommandError(f"{path.name}: integrity_check failed: {'; '.join(problems[:5])}")
+        return raw
+
+    def _unpack_snapshot(self, path, tmp):
+        # The main database and {year: file} for its archives, all verified.
+        # A checksum left without its archive means the archive went missing.
+        raw = self._unpack_verified(path, tmp)
+        archives = {}
+        for archive in self._archives(path):
+            year = int(archive.name[len('attendance_'):-len(SNAPSHOT_SUFFIX)])
+            archives[year] = self._unpack_verified(archive, tmp)
+        folder = _archive_dir(path)
+        if folder.is_dir():
+            for checksum_file in folder.glob(f'*{SNAPSHOT_SUFFIX}.sha256'):
+                if not checksum_file.with_suffix('').is_file():
+                    raise CommandError(f'{path.name}: {checksum_file.with_suffix("").name} is missing')
+        return raw, archives
+
+    def _verify(self, options):
+        paths = [self._resolve(options['name'])] if options['name'] else self._snapshots()
+        for path in paths:
+            with tempfile.TemporaryDirectory(dir=self.snapshot_dir) as tmp:
+                _, archives = self._unpack_snapshot(path, tmp)
+            self.stdout.write(self.style.SUCCESS(f'{path.name}: ok ({len(archives)} attendance archive(s))'))
+
+    # --- restore ---
+    def _restore(self, options):
+        path = self._resolve(options['name'])
+        if options['interactive']:
+            answer = input(f'This replaces everything in {self.db_path} with {path.name}. Type "yes" to continue: ')
+            if answer != 'yes':
+                raise CommandError('Restore cancelled.')
+
+        # Unpack and verify everything next to the database first, then copy
+        # each file in with one backup step: the live file is swapped page by
+        # page under SQLite's own locking, so running processes see the
+        # restored data on their next query. Live archive years the snapshot
+        # doesn't have are moved aside, or their rows would count twice once
+        # the restored Attendance table has them back; running processes only
+        # drop (or pick up) an archive year when they reconnect, so restart
+        # them if the set of years changed.
+        with tempfile.TemporaryDirectory(dir=self.db_path.parent) as tmp:
+            raw, archives = self._unpack_snapshot(path, tmp)
+            started = time.perf_counter()
+            self._copy_in(raw, self.db_path)
+            for year, archive in archives.items():
+                target = attendance_history.archive_path(year)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                self._copy_in(archive, target)
+            for year in attendance_history.archive_years():
+                if year not in archives:
+                    live = attendance_history.archive_path(year)
+                    aside = live.with_name(f'{live.name}.before-{path.name[:-len(SNAPSHOT_SUFFIX)]}')
+                    os.replace(live, aside)
+                    self.stdout.write(f'Archive {year} is not in the snapshot; moved it to {aside.name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Restored {path.name} with {len(archives)} attendance archive(s) in {time.perf_counter() - started:.2f}s'
+        ))
+
+    def _copy_in(self, raw, live_path):
+        source = sqlite3.connect(raw)
+        live = sqlite3.connect(live_path, timeout=30)
+        try:
+            source.backup(live, pages=-1)
+        finally:
+            live.close()
+            source.close()
+
+    # --- bench ---
+    def _bench(self, options):
+        # Everything runs on a scratch copy; the live database is only read.
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.snapshot_dir) as tmp:
+            copy = Path(tmp) / 'bench.sqlite3'
+            source, dest = sqlite3.connect(self.db_path), sqlite3.connect(copy)
+            source.backup(dest)
+            dest.close()
+            source.close()
+
+            table = Attendance._meta.db_table
+            conn = sqlite3.connect(copy)
+            student_ids = [row[0] for row in conn.execute(f'SELECT id FROM "{Student._meta.db_table}"')]
+            conn.close()
+            if not student_ids:
+                raise CommandError('Need at least one student to simulate attendance writes.')
+
+            baseline = self._write_load(copy, table, student_ids, options['writers'], lambda: None, options['seconds'])
+
+            result = {}
+
+            def snapshot():
+                started = time.perf_counter()
+                result['stats'] = self._snapshot_to(copy, Path(tmp) / f'bench{SNAPSHOT_SUFFIX}', options)
+                result['elapsed'] = time.perf_counter() - started
+
+            during = self._write_load(copy, table, student_ids, options['writers'], snapshot, None)
+
+        steps, restarts, pages = result['stats']
+        self.stdout.write(f"Snapshot under load: {result['elapsed']:.2f}s, {steps} steps, {restarts} restarts, final step {pages} pages")
+        self.stdout.write(f"{'':<18}{'writes/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        for label, latencies, elapsed in (('baseline', *baseline), ('during snapshot', *during)):
+            latencies.sort()
+            p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+            self.stdout.write(
+                f'{label:<18}{len(latencies) / elapsed:>10.0f}{statistics.median(latencies) * 1000:>9.2f}'
+                f'{p99 * 1000:>9.2f}{latencies[-1] * 1000:>9.2f}'
+            )
+
+    def _write_load(self, path, table, student_ids, writers, foreground, seconds):
+        # Writer threads upsert attendance (one row per commit, like the register)
+        # until foreground() returns and `seconds` (if given) have passed.
+        stop = threading.Event()
+        latencies = []
+        lock = threading.Lock()
+
+        def writer(offset):
+            conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+            day = date(2100, 1, 1) + timedelta(days=offset * 100000)
+            i = 0
+            local = []
+            while not stop.is_set():
+                started = time.perf_counter()
+                conn.execute(
+                    f'INSERT OR REPLACE INTO "{table}" (student_id, date, status) VALUES (?, ?, ?)',
+                    (student_ids[i % len(student_ids)], (day + timedelta(days=i)).isoformat(), 'Present'),
+                )
+                local.append(time.perf_counter() - started)
+                i += 1
+            conn.close()
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        foreground()
+        if seconds:
+            time.sleep(max(0, seconds - (time.perf_counter() - started)))
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return latencies, time.perf_counter() - started
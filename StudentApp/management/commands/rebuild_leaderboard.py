@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from StudentApp.leaderboard import import_results, parse_csv, refresh, UploadError
+from StudentApp.models import Batch
+
+
+# Rebuilds the batch leaderboard (BatchRanking / SubjectTopper). Run it once
+# after deploying the leaderboard, or after results were changed with
+# queryset.update(), which sends no signals. --upload imports a results CSV
+# first, like the upload form on /results/leaderboard/.
+#
+#   python manage.py rebuild_leaderboard
+#   python manage.py rebuild_leaderboard --batch Batch-001
+#   python manage.py rebuild_leaderboard --upload results.csv
+class Command(BaseCommand):
+    help = 'Recompute batch rankings and subject toppers from ExamResult'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', action='append', help='Batch name to rebuild (repeatable; default all)')
+        parser.add_argument('--upload', help='CSV of results to import (student_id, subject, marks[, passed])')
+
+    def handle(self, *args, **options):
+        if options['upload']:
+            try:
+                with open(options['upload'], encoding='utf-8-sig') as handle:
+                    created, updated, refreshed = import_results(parse_csv(handle.read()))
+            except (OSError, UploadError) as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(
+                f'{created} result(s) added, {updated} updated, {refreshed} batch(es) re-ranked'
+            ))
+            return
+
+        batches = Batch.objects.all()
+        if options['batch']:
+            batches = batches.filter(name__in=options['batch'])
+        for batch in batches.order_by('name'):
+            ranked = refresh([batch.id])
+            self.stdout.write(f'{batch.name}: {ranked} student(s) ranked')
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from StudentApp import placement
+from StudentApp.models import Student
+
+
+# Rebuilds PlacementEligibility for every student, a chunk at a time. Run it
+# once after deploying the eligibility table, and whenever the sources were
+# changed without signals (queryset.update(), raw SQL).
+#
+#   python manage.py rebuild_placement_eligibility
+class Command(BaseCommand):
+    help = 'Recompute the placement eligibility table from its source tables'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        ids = list(Student.objects.order_by('id').values_list('id', flat=True))
+        refreshed = 0
+        for start in range(0, len(ids), placement.CHUNK_SIZE):
+            refreshed += placement.refresh_students(ids[start:start + placement.CHUNK_SIZE])
+            self.stdout.write(f'  {refreshed}/{len(ids)} student(s)', ending='\r')
+        self.stdout.write('')
+        eligible = placement.shortlist().count()
+        self.stdout.write(self.style.SUCCESS(
+            f'{refreshed} student(s) refreshed, {eligible} eligible, in {time.perf_counter() - started:.1f}s'
+        ))
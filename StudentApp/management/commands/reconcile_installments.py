@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from StudentApp import installments
+
+
+# Daily run from cron: settles due and overdue installments against the
+# students' FeePayments and updates Student.is_fee_paid (installments.py).
+#
+#   python manage.py reconcile_installments
+#   python manage.py reconcile_installments --backfill      # schedules for older EMI / loan enrollments first
+#   python manage.py reconcile_installments --date 2026-07-01
+class Command(BaseCommand):
+    help = 'Mark due installments paid or overdue from fee payments and update fee status'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Reconcile as of this day (YYYY-MM-DD, default: today)')
+        parser.add_argument('--backfill', action='store_true', help='Create missing schedules before reconciling')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            today = parse_date(options['date'])
+            if today is None:
+                raise CommandError('--date must be YYYY-MM-DD')
+
+        started = time.perf_counter()
+        if options['backfill']:
+            created = 0
+            pending = list(installments.missing_schedules())
+            for start in range(0, len(pending), installments.CHUNK_SIZE):
+                created += installments.generate(pending[start:start + installments.CHUNK_SIZE])
+            self.stdout.write(f'{created} installment(s) created for {len(pending)} enrollment(s)')
+
+        totals = installments.reconcile(today)
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['students']} student(s) with dues: {totals['paid']} installment(s) paid, "
+            f"{totals['overdue']} newly overdue, {totals['flags']} fee status change(s), "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
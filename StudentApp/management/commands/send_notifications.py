@@ -0,0 +1,45 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from StudentApp.notifications import send_pending
+
+logger = logging.getLogger(__name__)
+
+
+# Drains the Notification outbox. Run from cron, or keep it running with --loop.
+#
+#   python manage.py send_notifications
+#   python manage.py send_notifications --loop --interval 30
+#
+# With --loop, an error in a round (database locked, a bug) is logged and the
+# next round runs after --interval instead of the worker exiting.
+class Command(BaseCommand):
+    help = 'Send queued notifications (coalesced per recipient, batched over one mail connection)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when the outbox is empty')
+        parser.add_argument('--interval', type=float, default=30, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            try:
+                sent, failed = send_pending(options['batch_size'])
+            except Exception:
+                if not options['loop']:
+                    raise
+                logger.exception('Sending notifications failed; retrying in %ss', options['interval'])
+                time.sleep(options['interval'])
+                continue
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                continue  # there may be more due right now
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Sent {total_sent} mail(s), gave up on {total_failed} notification(s).'))
@@ -0,0 +1,289 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+# --- METRICS (Prometheus text format at /metrics/) ---
+#
+# Every metric is stored as plain counters keyed by (name, labels); a histogram
+# is just its _bucket/_sum/_count counters. Each worker process keeps its own
+# counters in memory and writes them to METRICS_DIR/<pid>.json every
+# METRICS_FLUSH_INTERVAL seconds; a scrape adds up the files of all workers.
+# No shared memory or locks between processes, and no extra dependencies.
+#
+# Counters only ever go up. A scrape folds the files of workers that have
+# exited (restarts, forks, test and bench runs) into the scraping worker's own
+# counters and deletes them, so totals don't drop and the folder holds about
+# one file per live worker. Wiping METRICS_DIR on deploy is fine (Prometheus
+# treats it as a counter reset).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# name -> (type, help)
+FAMILIES = {
+    'studylab_http_request_duration_seconds': ('histogram', 'Request latency by view'),
+    'studylab_http_requests_total': ('counter', 'Responses by view, method and status code'),
+    'studylab_http_exceptions_total': ('counter', 'Unhandled exceptions raised by views'),
+    'studylab_db_queries_per_request': ('histogram', 'SQL queries run while serving one request'),
+    'studylab_db_query_duration_seconds_total': ('counter', 'Time spent in SQL queries by view'),
+    'studylab_cache_requests_total': ('counter', 'Cache lookups by view and result (hit/miss)'),
+    'studylab_cache_hit_ratio': ('gauge', 'Cache hits / lookups since the counters started'),
+}
+
+_lock = threading.Lock()
+_values = {}  # (name, ((label, value), ...)) -> float
+_last_flush = 0.0
+
+# Query and cache tallies for the request being served, or None outside requests
+_request_stats = ContextVar('metrics_request_stats', default=None)
+
+
+def _inc(name, labels, amount=1):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _values[key] = _values.get(key, 0) + amount
+
+
+def _observe(name, labels, value, buckets):
+    for bound in buckets:
+        if value <= bound:
+            _inc(f'{name}_bucket', {**labels, 'le': str(bound)})
+    _inc(f'{name}_bucket', {**labels, 'le': '+Inf'})
+    _inc(f'{name}_sum', labels, value)
+    _inc(f'{name}_count', labels)
+
+
+# --- Per-process files ---
+
+def _dir():
+    return Path(settings.METRICS_DIR)
+
+
+def _own_file():
+    return _dir() / f'{os.getpid()}.json'
+
+
+def _load(path):
+    try:
+        rows = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return {(name, tuple(tuple(pair) for pair in labels)): value for name, labels, value in rows}
+
+
+def flush(force=False):
+    global _last_flush
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _last_flush = now
+    with _lock:
+        rows = [[name, labels, value] for (name, labels), value in _values.items()]
+    folder = _dir()
+    folder.mkdir(parents=True, exist_ok=True)
+    # Write-then-rename, so a scrape never reads half a file
+    tmp = folder / f'.{os.getpid()}.tmp'
+    tmp.write_text(json.dumps(rows))
+    os.replace(tmp, _own_file())
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, but belongs to another user
+    return True
+
+
+def _adopt_dead_files():
+    # The rename decides which process gets a dead worker's file when two
+    # scrapes run at once; the other one just skips it
+    if os.name != 'posix':
+        return  # os.kill(pid, 0) would terminate the process on Windows
+    claimed = []
+    for path in _dir().glob('*.json'):
+        if not path.stem.isdigit() or int(path.stem) == os.getpid() or _alive(int(path.stem)):
+            continue
+        target = path.with_name(f'.adopted-{path.stem}-{os.getpid()}')
+        try:
+            os.replace(path, target)
+        except FileNotFoundError:
+            continue
+        claimed.append(target)
+    if not claimed:
+        return
+    with _lock:
+        for path in claimed:
+            for key, value in _load(path).items():
+                _values[key] = _values.get(key, 0) + value
+    flush(force=True)
+    for path in claimed:
+        path.unlink(missing_ok=True)
+
+
+def collect():
+    # Totals across every worker's file
+    _adopt_dead_files()
+    flush(force=True)
+    totals = {}
+    for path in _dir().glob('*.json'):
+        for key, value in _load(path).items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+# --- Hooks ---
+
+def _count_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats['queries'] += 1
+        stats['query_time'] += time.perf_counter() - start
+
+
+def _add_query_counter(sender, connection, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def _wrap_cache_get(cache_class):
+    original = cache_class.get
+    missing = object()
+
+    def get(self, key, default=None, version=None):
+        value = original(self, key, missing, version)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats['cache_misses' if value is missing else 'cache_hits'] += 1
+        return default if value is missing else value
+
+    cache_class.get = get
+
+
+def _reload():
+    # Start from this pid's file; also runs in forked workers (gunicorn --preload)
+    # so they don't carry the parent's counters into their own file
+    global _values
+    with _lock:
+        _values = _load(_own_file())
+
+
+def install():
+    # Once per process: count queries on every DB connection and hits/misses on
+    # every configured cache backend (same approach as template_profiling.install)
+    if getattr(install, 'done', False):
+        return
+    install.done = True
+
+    _reload()
+    os.register_at_fork(after_in_child=_reload)
+    atexit.register(flush, force=True)
+
+    connection_created.connect(_add_query_counter)
+    for connection in connections.all(initialized_only=True):
+        _add_query_counter(None, connection)
+
+    for cache_class in {type(caches[alias]) for alias in settings.CACHES}:
+        _wrap_cache_get(cache_class)
+
+
+# --- Request bookkeeping (MetricsMiddleware) ---
+
+def start():
+    return _request_stats.set({'queries': 0, 'query_time': 0.0, 'cache_hits': 0, 'cache_misses': 0})
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+def record_exception(request, exception):
+    _inc('studylab_http_exceptions_total', {'view': view_name(request), 'exception': type(exception).__name__})
+
+
+def record(request, token, status, elapsed):
+    stats = _request_stats.get()
+    _request_stats.reset(token)
+
+    view = view_name(request)
+    _observe('studylab_http_request_duration_seconds', {'view': view}, elapsed, LATENCY_BUCKETS)
+    _inc('studylab_http_requests_total', {'view': view, 'method': request.method, 'status': str(status)})
+    _observe('studylab_db_queries_per_request', {'view': view}, stats['queries'], QUERY_BUCKETS)
+    _inc('studylab_db_query_duration_seconds_total', {'view': view}, stats['query_time'])
+    for result, count in (('hit', stats['cache_hits']), ('miss', stats['cache_misses'])):
+        if count:
+            _inc('studylab_cache_requests_total', {'view': view, 'result': result}, count)
+    flush()
+
+
+# --- Exposition ---
+
+def _family(name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+            return name[:-len(suffix)]
+    return name
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _sort_key(item):
+    (name, labels), value = item
+    # Keep each histogram series together, buckets in numeric order (+Inf last)
+    le = [float(value) for key, value in labels if key == 'le']
+    return _family(name), [pair for pair in labels if pair[0] != 'le'], name, le
+
+
+def render(totals):
+    hits = sum(value for (name, labels), value in totals.items()
+               if name == 'studylab_cache_requests_total' and ('result', 'hit') in labels)
+    lookups = sum(value for (name, labels), value in totals.items() if name == 'studylab_cache_requests_total')
+    totals = {**totals, ('studylab_cache_hit_ratio', ()): hits / lookups if lookups else 0}
+
+    lines, current = [], None
+    for (name, labels), value in sorted(totals.items(), key=_sort_key):
+        family = _family(name)
+        if family != current:
+            kind, help_text = FAMILIES.get(family, ('untyped', ''))
+            lines += [f'# HELP {family} {help_text}', f'# TYPE {family} {kind}']
+            current = family
+        lines.append(f'{name}{_format_labels(labels)} {value:.10g}')
+    return '\n'.join(lines) + '\n'
+
+
+def exposition(request):
+    # Prometheus scrapes with `Authorization: Bearer <METRICS_TOKEN>`; staff can also
+    # look at it in the browser. Anyone else gets a 403.
+    token = settings.METRICS_TOKEN
+    header = request.headers.get('Authorization', '')
+    allowed = (token and constant_time_compare(header, f'Bearer {token}')) or request.user.is_staff
+    if not allowed:
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(render(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
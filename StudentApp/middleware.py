@@ -0,0 +1,151 @@
+import time
+from functools import partial
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.functional import SimpleLazyObject
+
+from . import metrics, profiling, student_profiles, template_profiling
+
+
+# All of these work both ways, like Django's MiddlewareMixin: under
+# Studylab/asgi.py the chain stays async, so async views run on the event loop
+# instead of every request being adapted through sync_to_async.
+class _BothModes:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+# --- METRICS ---
+# First in MIDDLEWARE so the latency covers the whole stack. Records latency,
+# status, SQL query count/time and cache hits/misses per URL name (metrics.py).
+class MetricsMiddleware(_BothModes):
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        metrics.install()
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = metrics.start()
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            metrics.record(request, token, status, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        token = metrics.start()
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            metrics.record(request, token, status, time.perf_counter() - started)
+
+    def process_exception(self, request, exception):
+        metrics.record_exception(request, exception)
+
+
+# --- STUDENT PROFILE ---
+# request.student: the logged-in user's Student (course joined) or None, looked
+# up from a short-lived cache the first time it's used (student_profiles.py).
+# Async views await request.astudent() instead. Goes after AuthenticationMiddleware.
+class StudentProfileMiddleware(_BothModes):
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        self._attach(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self._attach(request)
+        return await self.get_response(request)
+
+    def _attach(self, request):
+        request.student = SimpleLazyObject(partial(student_profiles.get_student, request))
+        request.astudent = partial(student_profiles.aget_student, request)
+
+
+# --- TEMPLATE PROFILING ---
+# Turned on with TEMPLATE_PROFILING = True in settings. Logs render time per
+# template and per {% block %} for each request and adds a Server-Timing header.
+class TemplateProfilingMiddleware(_BothModes):
+    def __init__(self, get_response):
+        if not getattr(settings, 'TEMPLATE_PROFILING', False):
+            raise MiddlewareNotUsed
+        template_profiling.install()
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = template_profiling.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            report = template_profiling.stop(token)
+        return self._report(request, response, report)
+
+    async def __acall__(self, request):
+        token = template_profiling.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            report = template_profiling.stop(token)
+        return self._report(request, response, report)
+
+    def _report(self, request, response, report):
+        template_profiling.log_report(request, report)
+        if report:
+            response['Server-Timing'] = template_profiling.server_timing(report)
+        return response
+
+
+# --- REQUEST PROFILING ---
+# Runs a request under cProfile when a staff member switched profiling on at
+# /profiles/ or it falls in REQUEST_PROFILE_SAMPLE_RATE (see profiling.py).
+# Sits after AuthenticationMiddleware so it can check request.user.is_staff.
+class RequestProfilerMiddleware(_BothModes):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if not self.async_mode:
+            # Only the sync chain needs it; an async chain would adapt it
+            # through sync_to_async on every request
+            self.process_view = self._profile_async_view
+
+    def _profile_async_view(self, request, view_func, view_args, view_kwargs):
+        # Async views of a profiled WSGI request are called from here, so they
+        # can be profiled on the event loop thread (profiling.py). Last in
+        # MIDDLEWARE, so no other process_view is skipped; an exception from
+        # the view still becomes a 500, but skips MetricsMiddleware.process_exception.
+        if not hasattr(request, '_view_profiles') or not iscoroutinefunction(view_func):
+            return None
+        view = profiling.profile_async_view(request, view_func)
+        return async_to_sync(view)(request, *view_args, **view_kwargs)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not profiling.should_profile(request):
+            return self.get_response(request)
+        return profiling.run(self.get_response, request)
+
+    async def __acall__(self, request):
+        if not await profiling.ashould_profile(request):
+            return await self.get_response(request)
+        return await profiling.arun(self.get_response, request)
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0007_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batch',
+            name='student_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='students', to='StudentApp.batch'),
+        ),
+        migrations.AlterField(
+            model_name='batch',
+            name='timetable_link',
+            field=models.URLField(blank=True, help_text='Link to LMS or Calendar'),
+        ),
+        migrations.AlterField(
+            model_name='student',
+            name='batch_no',
+            field=models.CharField(default='Batch-001', editable=False, max_length=50),
+        ),
+    ]
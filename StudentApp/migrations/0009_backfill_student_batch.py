@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+CHUNK_SIZE = 500
+
+
+def backfill_student_batch(apps, schema_editor):
+    Batch = apps.get_model('StudentApp', 'Batch')
+    Student = apps.get_model('StudentApp', 'Student')
+
+    # Batch rows were never referenced before 0008, so duplicate names can just go
+    for dup in Batch.objects.values('name').annotate(n=Count('id'), keep=Min('id')).filter(n__gt=1):
+        Batch.objects.filter(name=dup['name']).exclude(id=dup['keep']).delete()
+
+    for name in Student.objects.order_by().values_list('batch_no', flat=True).distinct():
+        batch = Batch.objects.filter(name=name).first() or Batch.objects.create(name=name)
+
+        # Small chunks, each committed on its own (the migration is non-atomic),
+        # so the student table is never locked for long
+        while True:
+            ids = list(
+                Student.objects.filter(batch_no=name, batch__isnull=True).values_list('id', flat=True)[:CHUNK_SIZE]
+            )
+            if not ids:
+                break
+            Student.objects.filter(id__in=ids).update(batch=batch)
+
+    for batch in Batch.objects.annotate(n=Count('students')):
+        Batch.objects.filter(id=batch.id).update(student_count=batch.n)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('StudentApp', '0008_student_batch'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_student_batch, migrations.RunPython.noop),
+    ]
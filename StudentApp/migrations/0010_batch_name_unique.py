@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0009_backfill_student_batch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='batch',
+            name='name',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0010_batch_name_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='seat_capacity',
+            field=models.PositiveIntegerField(blank=True, help_text='Leave empty for no limit', null=True),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def dedupe_enrollments(apps, schema_editor):
+    Course = apps.get_model('StudentApp', 'Course')
+    Enrollment = apps.get_model('StudentApp', 'Enrollment')
+
+    # Double-clicked / retried forms left several enrollments for one user and
+    # course. Keep one per pair (an approved one if any, else the first) so
+    # 0013 can make the pair unique. Run `manage.py backfill_funnel` afterwards
+    # to drop the extra rows from the BDM funnel counts.
+    duplicates = (
+        Enrollment.objects.values('student_user_id', 'course_id')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+    )
+    for dup in duplicates:
+        rows = Enrollment.objects.filter(student_user_id=dup['student_user_id'], course_id=dup['course_id'])
+        keep = rows.order_by('-is_approved', 'date_enrolled', 'id').values_list('id', flat=True).first()
+        rows.exclude(id=keep).delete()
+
+    for course in Course.objects.annotate(n=Count('enrollment')):
+        Course.objects.filter(id=course.id).update(seats_taken=course.n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0011_course_seats_enrollment_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_enrollments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0012_dedupe_enrollments'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='enrollment',
+            constraint=models.UniqueConstraint(fields=('student_user', 'course'), name='unique_enrollment_per_user_course'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0013_enrollment_unique_user_course'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_marks', models.IntegerField()),
+                ('subjects', models.PositiveIntegerField()),
+                ('subjects_passed', models.PositiveIntegerField()),
+                ('rank', models.PositiveIntegerField()),
+                ('percentile', models.FloatField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='StudentApp.batch')),
+                ('course', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='StudentApp.course')),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ranking', to='StudentApp.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['batch', 'course', 'rank'], name='StudentApp__batch_i_ce71a2_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SubjectTopper',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=100)),
+                ('marks', models.IntegerField()),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='StudentApp.batch')),
+                ('course', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='StudentApp.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='StudentApp.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['batch', 'course', 'subject'], name='StudentApp__batch_i_a0da64_idx')],
+            },
+        ),
+    ]
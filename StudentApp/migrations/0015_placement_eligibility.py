@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0014_batch_leaderboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlacementRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_attendance_pct', models.PositiveIntegerField(default=75)),
+                ('min_exams_passed', models.PositiveIntegerField(default=1)),
+                ('require_fee_paid', models.BooleanField(default=True)),
+                ('require_documents', models.BooleanField(default=True)),
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='placement_rule', to='StudentApp.course')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlacementEligibility',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='eligibility', serialize=False, to='StudentApp.student')),
+                ('willing', models.BooleanField(default=True)),
+                ('attendance_days', models.PositiveIntegerField(default=0)),
+                ('present_days', models.PositiveIntegerField(default=0)),
+                ('attendance_pct', models.FloatField(default=0)),
+                ('exams_passed', models.PositiveIntegerField(default=0)),
+                ('fee_paid', models.BooleanField(default=False)),
+                ('documents_verified', models.BooleanField(default=False)),
+                ('eligible', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='StudentApp.course')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'eligible'], name='StudentApp__course__2ee3a2_idx'), models.Index(fields=['eligible'], name='StudentApp__eligibl_4a6b88_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0015_placement_eligibility'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('bits', models.BigIntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='StudentApp.student')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('student', 'month'), name='unique_attendance_month')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0016_attendance_month'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Installment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveSmallIntegerField()),
+                ('due_date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('overdue', 'Overdue'), ('paid', 'Paid')], default='pending', max_length=10)),
+                ('paid_on', models.DateField(blank=True, null=True)),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installments', to='StudentApp.enrollment')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installments', to='StudentApp.student')),
+            ],
+            options={
+                'ordering': ['due_date', 'number'],
+                'indexes': [models.Index(fields=['status', 'due_date'], name='StudentApp__status_32955e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('enrollment', 'number'), name='unique_installment_number')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudentApp', '0017_installment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='fee_hold',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -9,6 +9,9 @@ class Course(models.Model):
     image = models.ImageField(upload_to='courses/images/') 
     price = models.DecimalField(max_digits=10, decimal_places=2)
     description = models.TextField()
+    seat_capacity = models.PositiveIntegerField(null=True, blank=True, help_text="Leave empty for no limit")
+    # Enrollments holding a seat; kept up to date with F() by enrollments.py / signals.py
+    seats_taken = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
@@ -29,6 +32,13 @@ class Enrollment(models.Model):
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     is_approved = models.BooleanField(default=False) 
     date_enrolled = models.DateTimeField(auto_now_add=True)
+    # Sent with the enrollment form, so a resubmitted form maps back to the same row
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student_user', 'course'], name='unique_enrollment_per_user_course'),
+        ]
 
     def __str__(self):
         return f"{self.student_user.username} - {self.course.name} ({self.payment_mode})"
@@ -49,8 +59,13 @@ class Student(models.Model):
     address = models.TextField(null=True, blank=True)
     gender = models.CharField(max_length=10, choices=[('M','Male'), ('F','Female')], default='M')
     
-    batch_no = models.CharField(max_length=50, default='Batch-001')
+    batch = models.ForeignKey('Batch', on_delete=models.SET_NULL, null=True, blank=True, related_name='students')
+    # Copy of batch.name kept in sync by signals.py (profile page, old links); filter on `batch`
+    batch_no = models.CharField(max_length=50, default='Batch-001', editable=False)
     is_fee_paid = models.BooleanField(default=False)
+    # Set while is_fee_paid is False because reconcile_installments found an
+    # overdue installment, so it only sets back the flags it cleared itself
+    fee_hold = models.BooleanField(default=False, editable=False)
     documents_verified = models.BooleanField(default=False)
     placement_willingness = models.BooleanField(default=True, verbose_name="Willing for Placement")
 
@@ -82,11 +97,46 @@ class FeePayment(models.Model):
     receipt_file = models.FileField(upload_to='receipts/', blank=True)
 
 
+class Installment(models.Model):
+    # Monthly schedule for EMI / loan enrollments (installments.py); settled
+    # against the student's FeePayments by `manage.py reconcile_installments`
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('overdue', 'Overdue'),
+        ('paid', 'Paid'),
+    ]
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='installments')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='installments')
+    number = models.PositiveSmallIntegerField()
+    due_date = models.DateField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    paid_on = models.DateField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['due_date', 'number']
+        constraints = [
+            models.UniqueConstraint(fields=['enrollment', 'number'], name='unique_installment_number'),
+        ]
+        indexes = [
+            # The daily scan: status = ... AND due_date <= today, a range per status
+            models.Index(fields=['status', 'due_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.student} #{self.number} due {self.due_date} ({self.status})"
+
+
 # --- 4. Academics & Operations ---
 
 class Batch(models.Model):
-    name = models.CharField(max_length=50)
-    timetable_link = models.URLField(help_text="Link to LMS or Calendar")
+    name = models.CharField(max_length=50, unique=True)
+    timetable_link = models.URLField(blank=True, help_text="Link to LMS or Calendar")
+    # Denormalized, kept up to date by signals.py
+    student_count = models.PositiveIntegerField(default=0, editable=False)
+
+    def __str__(self):
+        return self.name
     
 class LeaveApplication(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
@@ -116,11 +166,87 @@ class ExamResult(models.Model):
     passed = models.BooleanField(default=False)
     certificate_file = models.FileField(upload_to='certificates/', blank=True)
 
+# Leaderboard tables, rebuilt per batch by leaderboard.py from ExamResult.
+# Never edited by hand; read these instead of ranking ExamResult on the fly.
+class BatchRanking(models.Model):
+    batch = models.ForeignKey(Batch, on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, null=True)
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='ranking')
+    total_marks = models.IntegerField()
+    subjects = models.PositiveIntegerField()
+    subjects_passed = models.PositiveIntegerField()
+    rank = models.PositiveIntegerField()  # 1 = top; ties share a rank
+    percentile = models.FloatField()  # % of the batch + course scoring the same or lower
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['batch', 'course', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - #{self.rank} in {self.batch}"
+
+
+class SubjectTopper(models.Model):
+    batch = models.ForeignKey(Batch, on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, null=True)
+    subject = models.CharField(max_length=100)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    marks = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['batch', 'course', 'subject']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject}: {self.student} ({self.marks})"
+
+
 class Placement(models.Model):
     student = models.OneToOneField(Student, on_delete=models.CASCADE)
     willing_to_be_placed = models.BooleanField(default=True)
     interview_status = models.CharField(max_length=50, default='Ready')
 
+
+# Who may be shortlisted for placement in a course. Courses without a rule use
+# these field defaults.
+class PlacementRule(models.Model):
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, related_name='placement_rule')
+    min_attendance_pct = models.PositiveIntegerField(default=75)
+    min_exams_passed = models.PositiveIntegerField(default=1)
+    require_fee_paid = models.BooleanField(default=True)
+    require_documents = models.BooleanField(default=True)
+
+    def __str__(self):
+        return f"Placement rule for {self.course}"
+
+
+# One row per student, kept up to date by placement.py from Student, Placement,
+# Attendance and ExamResult, so the shortlist is a single indexed lookup.
+class PlacementEligibility(models.Model):
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name='eligibility')
+    course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True)
+    willing = models.BooleanField(default=True)
+    attendance_days = models.PositiveIntegerField(default=0)
+    present_days = models.PositiveIntegerField(default=0)
+    attendance_pct = models.FloatField(default=0)
+    exams_passed = models.PositiveIntegerField(default=0)
+    fee_paid = models.BooleanField(default=False)
+    documents_verified = models.BooleanField(default=False)
+    eligible = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['course', 'eligible']),
+            models.Index(fields=['eligible']),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {'eligible' if self.eligible else 'not eligible'}"
+
 class Attendance(models.Model):
     STATUS_CHOICES = [
         ('Present', 'Present'),
@@ -138,6 +264,23 @@ class Attendance(models.Model):
 
     def __str__(self):
         return f"{self.student.student_id} - {self.date} - {self.status}"
+
+
+# Packed alternative to Attendance (see attendance_bitmap.py): one row per student
+# per month, two bits per day (day 1 in the lowest bits). 0 = not marked,
+# 1 = Present, 2 = Absent, 3 = Late. 31 days use 62 bits of the BigInteger.
+class AttendanceMonth(models.Model):
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    month = models.DateField()  # first day of the month
+    bits = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'month'], name='unique_attendance_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.month:%Y-%m}"
     
 
 # StudentApp/models.py
@@ -162,4 +305,40 @@ class AdmissionRequest(models.Model):
     is_processed = models.BooleanField(default=False)
 
     def __str__(self):
-        return f"{self.full_name} - {self.course.name}"
\ No newline at end of file
+        return f"{self.full_name} - {self.course.name}"
+
+# --- 6. Notifications ---
+
+class Notification(models.Model):
+    # Outbox: rows are written in the same transaction as the event (leave decided,
+    # student marked absent) and mailed later by `manage.py send_notifications`.
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    KIND_CHOICES = [
+        ('leave', 'Leave Decision'),
+        ('absence', 'Absence'),
+    ]
+
+    recipient = models.EmailField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim = models.CharField(max_length=32, blank=True)  # set by the worker that is sending it
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient} - {self.subject} ({self.status})"
@@ -0,0 +1,145 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_BASE = timedelta(minutes=1)   # 1, 2, 4, 8 ... minutes between tries
+RETRY_MAX = timedelta(hours=1)
+# A worker that dies mid-send leaves its rows claimed; they become due again after this
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+# --- QUEUEING (called from signals / views, inside their transaction) ---
+
+def _student_name(student):
+    return student.user.first_name or student.user.username
+
+
+def queue_leave_decision(leave):
+    email = leave.student.user.email
+    if not email:
+        return None
+    return Notification.objects.create(
+        recipient=email,
+        kind='leave',
+        subject=f"Leave {leave.status.lower()}: {leave.start_date:%d %b} - {leave.end_date:%d %b %Y}",
+        body=(
+            f"Hi {_student_name(leave.student)},\n\n"
+            f"Your leave request from {leave.start_date:%d %b %Y} to {leave.end_date:%d %b %Y} "
+            f"has been {leave.status.lower()}."
+        ),
+    )
+
+
+def queue_absences(students, date):
+    # students: Student objects with user loaded (select_related('user'))
+    notices = [
+        Notification(
+            recipient=student.user.email,
+            kind='absence',
+            subject=f"Marked absent on {date}",
+            body=f"Hi {_student_name(student)},\n\nYou were marked absent on {date}.",
+        )
+        for student in students
+        if student.user.email
+    ]
+    return Notification.objects.bulk_create(notices)
+
+
+# --- SENDING (manage.py send_notifications) ---
+
+def _claim(batch_size):
+    # Mark a batch as ours first, so two workers never mail the same rows
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = Q(status='pending', next_attempt_at__lte=now)
+    ids = list(Notification.objects.filter(due).order_by('next_attempt_at').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    Notification.objects.filter(due, id__in=ids).update(claim=token, next_attempt_at=now + CLAIM_LEASE)
+    return list(Notification.objects.filter(claim=token, status='pending').order_by('created_at'))
+
+
+def _coalesce(recipient, notices):
+    # One mail per recipient per batch, however many events they had
+    if len(notices) == 1:
+        subject, body = notices[0].subject, notices[0].body
+    else:
+        subject = f"You have {len(notices)} new notifications"
+        body = '\n\n----\n\n'.join(f"{notice.subject}\n\n{notice.body}" for notice in notices)
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [recipient])
+
+
+def _retry_at(attempts):
+    delay = min(RETRY_BASE * (2 ** (attempts - 1)), RETRY_MAX)
+    return timezone.now() + delay
+
+
+def _release(recipient, group, exc):
+    # Hand a group that couldn't be sent back to the queue with backoff, or give
+    # up on it after MAX_ATTEMPTS. Returns the number of notifications given up on.
+    ids = [notice.id for notice in group]
+    attempts = max(notice.attempts for notice in group) + 1
+    logger.warning('Sending %d notification(s) to %s failed (attempt %d): %s',
+                   len(group), recipient, attempts, exc)
+    if attempts >= MAX_ATTEMPTS:
+        Notification.objects.filter(id__in=ids).update(
+            status='failed', attempts=attempts, last_error=str(exc), claim='',
+        )
+        return len(group)
+    Notification.objects.filter(id__in=ids).update(
+        attempts=attempts, last_error=str(exc), claim='', next_attempt_at=_retry_at(attempts),
+    )
+    return 0
+
+
+# Sends one batch of due notifications. Returns (mails sent, notifications given up on).
+def send_pending(batch_size=200, connection=None):
+    notices = _claim(batch_size)
+    if not notices:
+        return 0, 0
+
+    by_recipient = {}
+    for notice in notices:
+        by_recipient.setdefault(notice.recipient, []).append(notice)
+
+    sent = failed = 0
+    connection = connection or get_connection()
+    # One connection for the whole batch (one SMTP login instead of one per mail).
+    # If it can't be opened (server down, login refused) nothing was sent, and
+    # every group goes back to the queue like a failed send.
+    try:
+        connection.open()
+    except Exception as exc:
+        for recipient, group in by_recipient.items():
+            failed += _release(recipient, group, exc)
+        return sent, failed
+
+    try:
+        for recipient, group in by_recipient.items():
+            try:
+                connection.send_messages([_coalesce(recipient, group)])
+            except Exception as exc:
+                failed += _release(recipient, group, exc)
+                continue
+
+            Notification.objects.filter(id__in=[notice.id for notice in group]).update(
+                status='sent', sent_at=timezone.now(), claim='',
+            )
+            sent += 1
+    finally:
+        try:
+            connection.close()
+        except Exception as exc:
+            # The mails are out and recorded; a failed QUIT changes nothing
+            logger.warning('Closing the mail connection failed: %s', exc)
+    return sent, failed
@@ -0,0 +1,138 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Case, Count, Q, Value, When
+
+from . import attendance_history
+from .models import ExamResult, PlacementEligibility, PlacementRule, Student
+
+CHUNK_SIZE = 500
+
+
+# --- PLACEMENT ELIGIBILITY ---
+#
+# PlacementEligibility holds, per student, everything the placement rules look
+# at (willingness, attendance %, passed exams, fees, documents) plus the
+# resulting `eligible` flag, so the shortlist is one indexed query instead of a
+# join with per-student aggregates.
+#
+# It's kept current incrementally: signals.py queues the students touched by a
+# Student / Placement / Attendance / ExamResult save or delete, and they're
+# recomputed once when the transaction commits. Bulk writers (results upload,
+# trainer attendance sync) queue their students with refresh_on_commit(). Editing a
+# PlacementRule re-evaluates its course with one UPDATE.
+
+def rule_for(course_id):
+    return PlacementRule.objects.filter(course_id=course_id).first() or PlacementRule(course_id=course_id)
+
+
+def _condition(rule):
+    condition = Q(willing=True, attendance_pct__gte=rule.min_attendance_pct, exams_passed__gte=rule.min_exams_passed)
+    if rule.require_fee_paid:
+        condition &= Q(fee_paid=True)
+    if rule.require_documents:
+        condition &= Q(documents_verified=True)
+    return condition
+
+
+def evaluate(rows, rule):
+    # Sets `eligible` on a PlacementEligibility queryset for one course's rule
+    return rows.update(eligible=Case(When(_condition(rule), then=Value(True)), default=Value(False)))
+
+
+def reevaluate_course(course_id):
+    return evaluate(PlacementEligibility.objects.filter(course_id=course_id), rule_for(course_id))
+
+
+def _refresh_chunk(student_ids):
+    students = Student.objects.filter(id__in=student_ids).values(
+        'id', 'course_id', 'placement_willingness', 'placement__willing_to_be_placed',
+        'is_fee_paid', 'documents_verified',
+    )
+    attendance = attendance_history.counts_by_student(student_ids)
+    passed = dict(
+        ExamResult.objects.filter(student_id__in=student_ids, passed=True)
+        .values('student_id').annotate(n=Count('id')).values_list('student_id', 'n')
+    )
+
+    rows = []
+    for student in students:
+        days, present = attendance.get(student['id'], (0, 0))
+        rows.append(PlacementEligibility(
+            student_id=student['id'],
+            course_id=student['course_id'],
+            # No Placement row yet counts as willing
+            willing=student['placement_willingness'] and student['placement__willing_to_be_placed'] is not False,
+            attendance_days=days,
+            present_days=present,
+            attendance_pct=round(present * 100 / days, 2) if days else 0,
+            exams_passed=passed.get(student['id'], 0),
+            fee_paid=student['is_fee_paid'],
+            documents_verified=student['documents_verified'],
+        ))
+
+    with transaction.atomic():
+        PlacementEligibility.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['student'],
+            update_fields=[
+                'course', 'willing', 'attendance_days', 'present_days', 'attendance_pct',
+                'exams_passed', 'fee_paid', 'documents_verified', 'updated_at',
+            ],
+        )
+        for course_id in {row.course_id for row in rows}:
+            evaluate(PlacementEligibility.objects.filter(student_id__in=student_ids, course_id=course_id), rule_for(course_id))
+    return len(rows)
+
+
+def refresh_students(student_ids):
+    student_ids = sorted(set(student_ids))
+    refreshed = 0
+    for start in range(0, len(student_ids), CHUNK_SIZE):
+        refreshed += _refresh_chunk(student_ids[start:start + CHUNK_SIZE])
+    return refreshed
+
+
+# Same on-commit batching as leaderboard.refresh_on_commit: every save queues a
+# callback, the first one to run refreshes every student pending.
+_pending = threading.local()
+
+
+def _refresh_pending():
+    student_ids = _pending.__dict__.pop('student_ids', None)
+    if student_ids:
+        refresh_students(student_ids)
+
+
+def refresh_on_commit(*student_ids):
+    _pending.__dict__.setdefault('student_ids', set()).update(student_ids)
+    transaction.on_commit(_refresh_pending)
+
+
+# --- SHORTLIST ---
+
+def shortlist(course_id=None):
+    rows = PlacementEligibility.objects.filter(eligible=True)
+    if course_id is not None:
+        rows = rows.filter(course_id=course_id)
+    return rows
+
+
+EXPORT_COLUMNS = [
+    ('Student ID', 'student__student_id'),
+    ('Name', 'student__user__first_name'),
+    ('Email', 'student__user__email'),
+    ('Phone', 'student__phone'),
+    ('Course', 'course__name'),
+    ('Batch', 'student__batch__name'),
+    ('Attendance %', 'attendance_pct'),
+    ('Exams passed', 'exams_passed'),
+]
+
+
+def export_rows(course_id=None):
+    # Header + one tuple per eligible student, streamed from the database
+    yield [label for label, _ in EXPORT_COLUMNS]
+    rows = shortlist(course_id).order_by('course__name', 'student__student_id')
+    yield from rows.values_list(*[lookup for _, lookup in EXPORT_COLUMNS]).iterator(chunk_size=2000)
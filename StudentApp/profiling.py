@@ -0,0 +1,271 @@
+import cProfile
+import json
+import pstats
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+# --- ON-DEMAND REQUEST PROFILING ---
+#
+# RequestProfilerMiddleware runs a request under cProfile when either
+#   - the staff member turned profiling on from /profiles/ (a signed cookie,
+#     only honoured for staff users), or
+#   - random() < REQUEST_PROFILE_SAMPLE_RATE (any request, off by default).
+# Each profile is a .prof file (pstats format, opens in snakeviz etc.) plus a
+# .json file with the request details. Only the newest REQUEST_PROFILE_KEEP are kept.
+#
+# Only one request is profiled at a time (Python 3.12+ refuses a second active
+# profiler); requests arriving meanwhile just run unprofiled.
+#
+# cProfile only sees the thread it was enabled on. Under WSGI (run) that is the
+# request thread, and async views run on async_to_sync's event loop thread
+# instead, so the middleware calls them through profile_async_view, which
+# profiles the view in that thread; save() merges both into one profile. Under
+# ASGI (arun) the profiler runs on the event loop thread, where async views
+# run; sync views run on sync_to_async worker threads and only show up as the
+# time spent waiting for them.
+
+COOKIE_NAME = 'profile_requests'
+COOKIE_SALT = 'StudentApp.profiling'
+COOKIE_MAX_AGE = 15 * 60  # staff profiling switches itself off after this
+
+_NAME_RE = re.compile(r'^[\w.-]+$')
+
+_active = threading.Lock()
+
+
+def profile_dir():
+    return Path(settings.REQUEST_PROFILE_DIR)
+
+
+def should_profile(request):
+    if request.get_signed_cookie(COOKIE_NAME, default=None, salt=COOKIE_SALT, max_age=COOKIE_MAX_AGE):
+        return request.user.is_staff
+    rate = getattr(settings, 'REQUEST_PROFILE_SAMPLE_RATE', 0)
+    return rate > 0 and random.random() < rate
+
+
+async def ashould_profile(request):
+    if request.get_signed_cookie(COOKIE_NAME, default=None, salt=COOKIE_SALT, max_age=COOKIE_MAX_AGE):
+        return (await request.auser()).is_staff
+    rate = getattr(settings, 'REQUEST_PROFILE_SAMPLE_RATE', 0)
+    return rate > 0 and random.random() < rate
+
+
+def enable_for(response):
+    response.set_signed_cookie(COOKIE_NAME, '1', salt=COOKIE_SALT, max_age=COOKIE_MAX_AGE, httponly=True, samesite='Lax')
+
+
+def disable_for(response):
+    response.delete_cookie(COOKIE_NAME)
+
+
+def run(get_response, request):
+    if not _active.acquire(blocking=False):
+        return get_response(request)
+    try:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool (debugger, coverage) already holds the hook
+            return get_response(request)
+        request._view_profiles = []  # filled by profile_async_view
+        started = time.perf_counter()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+    finally:
+        _active.release()
+
+    try:
+        save(profiler, request, response, elapsed)
+    except OSError:
+        pass  # never fail the request because the profile couldn't be written
+    return response
+
+
+def profile_async_view(request, view):
+    # WSGI only: wraps an async view of a request run() is profiling, so its
+    # own work on the event loop thread is recorded too
+    async def profiled(*args, **kwargs):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+: the request's profiler already covers every thread
+            return await view(*args, **kwargs)
+        try:
+            return await view(*args, **kwargs)
+        finally:
+            profiler.disable()
+            request._view_profiles.append(profiler)
+    return profiled
+
+
+async def arun(get_response, request):
+    # ASGI: profiles the event loop thread, which runs async views (and
+    # whatever else the loop does meanwhile); see the note at the top
+    if not _active.acquire(blocking=False):
+        return await get_response(request)
+    try:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return await get_response(request)
+        started = time.perf_counter()
+        try:
+            response = await get_response(request)
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+    finally:
+        _active.release()
+
+    try:
+        # save() reads request.user, which may still be the sync lazy loader
+        await sync_to_async(save)(profiler, request, response, elapsed)
+    except OSError:
+        pass
+    return response
+
+
+def save(profiler, request, response, elapsed):
+    folder = profile_dir()
+    folder.mkdir(parents=True, exist_ok=True)
+
+    match = getattr(request, 'resolver_match', None)
+    url_name = (match.url_name if match else None) or 'unresolved'
+    now = timezone.now()
+    name = f"{now:%Y%m%d-%H%M%S-%f}-{url_name}"
+
+    stats = pstats.Stats(profiler)
+    for view_profiler in getattr(request, '_view_profiles', ()):
+        stats.add(view_profiler)
+    stats.dump_stats(folder / f'{name}.prof')
+    (folder / f'{name}.json').write_text(json.dumps({
+        'name': name,
+        'created': now.isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'url_name': url_name,
+        'view': match._func_path if match else None,
+        'status': response.status_code,
+        'duration_ms': round(elapsed * 1000, 2),
+        'user': request.user.get_username() if getattr(request, 'user', None) and request.user.is_authenticated else None,
+    }))
+    prune()
+
+
+def prune(keep=None):
+    keep = settings.REQUEST_PROFILE_KEEP if keep is None else keep
+    for meta in sorted(profile_dir().glob('*.json'), reverse=True)[keep:]:
+        meta.unlink(missing_ok=True)
+        meta.with_suffix('.prof').unlink(missing_ok=True)
+
+
+# --- Reading profiles back (staff pages) ---
+
+def list_profiles(url_name=None):
+    folder = profile_dir()
+    if not folder.is_dir():
+        return []
+    profiles = []
+    for meta in sorted(folder.glob('*.json'), reverse=True):
+        try:
+            info = json.loads(meta.read_text())
+        except (OSError, ValueError):
+            continue
+        if url_name and info.get('url_name') != url_name:
+            continue
+        profiles.append(info)
+    return profiles
+
+
+def load(name):
+    # Returns (metadata, pstats.Stats) or None. `name` comes from the URL, so
+    # only plain file names inside the profile folder are accepted.
+    if not _NAME_RE.match(name):
+        return None
+    meta, prof = profile_dir() / f'{name}.json', profile_dir() / f'{name}.prof'
+    if not meta.is_file() or not prof.is_file():
+        return None
+    return json.loads(meta.read_text()), pstats.Stats(str(prof))
+
+
+def _label(func):
+    filename, line, function = func
+    if filename == '~':
+        return function  # builtins, e.g. <method 'execute' of 'sqlite3.Cursor' objects>
+    for marker in ('site-packages/', str(settings.BASE_DIR) + '/'):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+    return f'{filename}:{line}({function})'
+
+
+SORT_FIELDS = {'cumulative': 'cumtime_ms', 'tottime': 'tottime_ms', 'calls': 'calls'}
+
+
+def top_functions(stats, sort='cumulative', limit=40):
+    field = SORT_FIELDS.get(sort, 'cumtime_ms')
+    rows = [
+        {
+            'function': _label(func),
+            'calls': nc,
+            'primitive_calls': cc,
+            'tottime_ms': tt * 1000,
+            'cumtime_ms': ct * 1000,
+            'percall_ms': ct * 1000 / nc if nc else 0,
+        }
+        for func, (cc, nc, tt, ct, callers) in stats.stats.items()
+    ]
+    rows.sort(key=lambda row: row[field], reverse=True)
+    return rows[:limit]
+
+
+def call_graph(stats, max_depth=8, min_fraction=0.01):
+    # Callee tree from the view function down, children by cumulative time.
+    # pstats stores callers per function, so invert that first.
+    callees = {}
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        for caller, caller_stats in callers.items():
+            # caller_stats: (cc, nc, tt, ct) of func when called from caller
+            callees.setdefault(caller, []).append((func, caller_stats[3]))
+
+    # Root the tree at the view: the most expensive function in an app's views.py / api.py.
+    # A profile without one (a sync view under ASGI runs on a worker thread, see the
+    # note at the top) falls back to the top of the profile.
+    roots = [
+        func for func in stats.stats
+        if func[0].replace('\\', '/').endswith(('App/views.py', 'App/api.py'))
+    ] or list(stats.stats)
+    if not roots:
+        return None
+    root = max(roots, key=lambda func: stats.stats[func][3])
+    total = stats.stats[root][3] or 1e-9
+
+    def build(func, cumtime, depth, seen):
+        node = {
+            'function': _label(func),
+            'cumtime_ms': cumtime * 1000,
+            'percent': round(cumtime * 100 / total, 1),
+            'children': [],
+        }
+        if depth < max_depth and func not in seen:
+            children = sorted(callees.get(func, []), key=lambda child: child[1], reverse=True)
+            for child, child_time in children:
+                if child_time / total < min_fraction:
+                    break
+                node['children'].append(build(child, child_time, depth + 1, seen | {func}))
+        return node
+
+    return build(root, total, 0, frozenset())
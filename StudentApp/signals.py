@@ -1,7 +1,16 @@
-from django.db.models.signals import post_save
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import AdmissionRequest, Student
+from .cache_versions import bump_model_version
+from django.db.models import F
+from .models import (
+    AdmissionRequest, Attendance, Batch, Course, Enrollment, ExamResult, LeaveApplication, Placement,
+    PlacementRule, Student,
+)
+from .leaderboard import refresh_on_commit as refresh_leaderboard
+from .notifications import queue_leave_decision
+from . import attendance_bitmap, attendance_history, installments, placement, student_profiles
 
 @receiver(post_save, sender=AdmissionRequest)
 def create_student_on_approval(sender, instance, created, **kwargs):
@@ -30,4 +39,203 @@ def create_student_on_approval(sender, instance, created, **kwargs):
                 address=instance.address,
                 is_fee_paid=False # Default to false until they pay
             )
-            print(f"Student {instance.full_name} created successfully!")
\ No newline at end of file
+            print(f"Student {instance.full_name} created successfully!")
+
+
+# --- FRAGMENT CACHE INVALIDATION ---
+# course.html caches one card per course, keyed on the Course version
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def bump_course_version(sender, **kwargs):
+    bump_model_version('Course')
+
+
+# --- LEAVE DECISION NOTIFICATIONS ---
+# Queue a mail when the admin moves a leave out of Pending (or changes the decision).
+# The outbox row is written in the same transaction as the status change.
+@receiver(pre_save, sender=LeaveApplication)
+def remember_leave_status(sender, instance, **kwargs):
+    instance._old_status = None
+    if instance.pk:
+        instance._old_status = LeaveApplication.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=LeaveApplication)
+def notify_leave_decision(sender, instance, created, **kwargs):
+    if created or instance.status == 'Pending':
+        return
+    if instance._old_status != instance.status:
+        queue_leave_decision(instance)
+
+
+# --- STUDENT BATCH LINK & PER-BATCH COUNTS ---
+# Students created with just a batch_no (approval signal above, enroll_course),
+# or given a new one, get linked to that Batch; otherwise batch_no only mirrors
+# batch.name.
+@receiver(pre_save, sender=Student)
+def sync_student_batch(sender, instance, **kwargs):
+    instance._old_batch_id, old_batch_no, instance._old_course_id = None, None, None
+    if instance.pk:
+        instance._old_batch_id, old_batch_no, instance._old_course_id = (
+            Student.objects.filter(pk=instance.pk).values_list('batch_id', 'batch_no', 'course_id').first()
+            or (None, None, None)
+        )
+
+    if instance.batch_id is not None:
+        instance.batch_no = instance.batch.name
+    elif instance._old_batch_id is not None:
+        instance.batch_no = ''  # batch was cleared on purpose
+    elif instance.batch_no and instance.batch_no != old_batch_no:
+        instance.batch, _ = Batch.objects.get_or_create(name=instance.batch_no)
+    else:
+        # Name left over from a deleted batch (SET_NULL doesn't touch batch_no);
+        # linking it would bring the batch back
+        instance.batch_no = ''
+
+
+@receiver(post_delete, sender=Batch)
+def clear_deleted_batch_name(sender, instance, **kwargs):
+    # Its students were unlinked by SET_NULL; drop the mirrored name too
+    students = Student.objects.filter(batch__isnull=True, batch_no=instance.name)
+    ids = list(students.values_list('id', flat=True))
+    students.update(batch_no='')
+    student_profiles.forget_students(ids)
+
+
+@receiver(post_save, sender=Student)
+def update_batch_counts(sender, instance, **kwargs):
+    old, new = instance._old_batch_id, instance.batch_id
+    if old == new:
+        return
+    if old is not None:
+        Batch.objects.filter(pk=old).update(student_count=F('student_count') - 1)
+    if new is not None:
+        Batch.objects.filter(pk=new).update(student_count=F('student_count') + 1)
+
+
+@receiver(post_save, sender=Student)
+def rerank_moved_student(sender, instance, **kwargs):
+    # Ranks are per batch + course: a student changing either leaves one
+    # partition and joins another. refresh() rebuilds whole batches, which
+    # covers both courses when only the course changed.
+    old = (instance._old_batch_id, instance._old_course_id)
+    if old != (instance.batch_id, instance.course_id):
+        refresh_leaderboard(instance._old_batch_id, instance.batch_id)
+
+
+@receiver(post_delete, sender=Student)
+def uncount_deleted_student(sender, instance, **kwargs):
+    if instance.batch_id is not None:
+        Batch.objects.filter(pk=instance.batch_id).update(student_count=F('student_count') - 1)
+
+
+# --- COURSE SEAT COUNTS ---
+# enrollments.enroll() takes the seat itself (checked against seat_capacity);
+# these keep Course.seats_taken right for enrollments added, moved or deleted
+# anywhere else (admin, shell).
+@receiver(pre_save, sender=Enrollment)
+def remember_enrollment_course(sender, instance, **kwargs):
+    instance._old_course_id = instance._old_approved = None
+    if instance.pk:
+        instance._old_course_id, instance._old_approved = (
+            Enrollment.objects.filter(pk=instance.pk).values_list('course_id', 'is_approved').first() or (None, None)
+        )
+
+
+@receiver(post_save, sender=Enrollment)
+def update_seat_counts(sender, instance, created, **kwargs):
+    if created and getattr(instance, '_seat_taken', False):
+        return
+    old, new = instance._old_course_id, instance.course_id
+    if old == new:
+        return
+    if old is not None:
+        Course.objects.filter(pk=old).update(seats_taken=F('seats_taken') - 1)
+    Course.objects.filter(pk=new).update(seats_taken=F('seats_taken') + 1)
+
+
+@receiver(post_delete, sender=Enrollment)
+def free_seat(sender, instance, **kwargs):
+    Course.objects.filter(pk=instance.course_id).update(seats_taken=F('seats_taken') - 1)
+
+
+# --- INSTALLMENT SCHEDULES ---
+# EMI / loan enrollments get their schedule when created, or on approval if the
+# student had no profile yet (installments.generate skips existing ones)
+@receiver(post_save, sender=Enrollment)
+def create_installments(sender, instance, created, **kwargs):
+    if created or (instance.is_approved and not instance._old_approved):
+        installments.generate([instance])
+
+
+# --- BATCH LEADERBOARD ---
+# Single results edited in the admin; bulk uploads refresh in leaderboard.import_results
+@receiver(post_save, sender=ExamResult)
+@receiver(post_delete, sender=ExamResult)
+def rerank_batch(sender, instance, **kwargs):
+    batch_id = Student.objects.filter(pk=instance.student_id).values_list('batch_id', flat=True).first()
+    if batch_id is not None:
+        refresh_leaderboard(batch_id)
+
+
+# --- CACHED REQUEST.STUDENT ---
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def forget_student_profile(sender, instance, **kwargs):
+    student_profiles.forget(instance.user_id)
+
+
+# --- PLACEMENT ELIGIBILITY ---
+# Recompute the touched students once the transaction commits (placement.py)
+@receiver(post_save, sender=Student)
+def refresh_student_eligibility(sender, instance, **kwargs):
+    placement.refresh_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Placement)
+@receiver(post_delete, sender=Placement)
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+@receiver(post_save, sender=ExamResult)
+@receiver(post_delete, sender=ExamResult)
+def refresh_eligibility(sender, instance, **kwargs):
+    placement.refresh_on_commit(instance.student_id)
+
+
+@receiver(post_save, sender=PlacementRule)
+@receiver(post_delete, sender=PlacementRule)
+def reevaluate_course_eligibility(sender, instance, **kwargs):
+    placement.reevaluate_course(instance.course_id)
+
+
+# --- PACKED ATTENDANCE MIRROR ---
+# While ATTENDANCE_BITMAP_MIRROR is on, every Attendance write is repeated in
+# AttendanceMonth (attendance_bitmap.py)
+@receiver(pre_save, sender=Attendance)
+def remember_attendance_date(sender, instance, **kwargs):
+    instance._old_date = None
+    if instance.pk and attendance_bitmap.mirror_enabled():
+        instance._old_date = Attendance.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+
+
+@receiver(post_save, sender=Attendance)
+def mirror_attendance(sender, instance, **kwargs):
+    if not attendance_bitmap.mirror_enabled():
+        return
+    if instance._old_date and instance._old_date != instance.date:
+        attendance_bitmap.unmark(instance.student_id, instance._old_date)
+    attendance_bitmap.mark(instance.student_id, instance.date, instance.status)
+
+
+@receiver(post_delete, sender=Attendance)
+def unmirror_attendance(sender, instance, **kwargs):
+    if attendance_bitmap.mirror_enabled():
+        attendance_bitmap.unmark(instance.student_id, instance.date)
+
+
+# --- ATTENDANCE ARCHIVES ---
+# Yearly archive files are ATTACHed when a history query first needs them
+# (attendance_history.py); a new connection starts with none
+@receiver(connection_created)
+def reset_attendance_archives(sender, connection, **kwargs):
+    attendance_history.forget_attached(connection)
@@ -0,0 +1,83 @@
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache_versions import model_version
+from .models import Student
+
+# Cached in place of a Student for users without a profile (staff, new
+# sign-ups), so they don't cost a query on every request either
+NO_PROFILE = 'none'
+
+
+# --- REQUEST.STUDENT (StudentProfileMiddleware) ---
+#
+# The logged-in user's Student, with course joined, cached for
+# STUDENT_PROFILE_TTL seconds under the user id. The key also carries the
+# Course version (cache_versions.py), so editing a course drops every profile
+# that embeds it; signals.py forgets a user's entry when their Student is
+# saved or deleted, and bulk Student updates call forget_students().
+# Forgetting only reaches the current process's LocMemCache, so other workers
+# can serve the old profile until the TTL runs out (see settings).
+# Looked up at most once per request, and only when a view asks for it.
+
+def _key(user_id, course_version):
+    return f'student-profile:{user_id}:{course_version}'
+
+
+def _ttl():
+    return getattr(settings, 'STUDENT_PROFILE_TTL', 30)
+
+
+def _attach_user(student, user):
+    # The request already has the user; don't let student.user query it again
+    if student is not None:
+        student.user = user
+    return student
+
+
+def get_student(request):
+    if not hasattr(request, '_cached_student'):
+        request._cached_student = _load(request.user)
+    return request._cached_student
+
+
+def _load(user):
+    if not user.is_authenticated:
+        return None
+    key = _key(user.pk, model_version('Course'))
+    student = cache.get(key)
+    if student is None:
+        student = Student.objects.select_related('course').filter(user=user).first() or NO_PROFILE
+        cache.set(key, student, _ttl())
+    return _attach_user(student if isinstance(student, Student) else None, user)
+
+
+async def aget_student(request):
+    # Async views: same lookup through the async ORM and cache APIs
+    if not hasattr(request, '_cached_student'):
+        user = await request.auser()
+        student = None
+        if user.is_authenticated:
+            key = _key(user.pk, model_version('Course'))
+            student = await cache.aget(key)
+            if student is None:
+                student = await Student.objects.select_related('course').filter(user=user).afirst() or NO_PROFILE
+                await cache.aset(key, student, _ttl())
+            student = _attach_user(student if isinstance(student, Student) else None, user)
+        request._cached_student = student
+    return request._cached_student
+
+
+def forget(*user_ids):
+    # After commit, so a request in between can't cache the old row again
+    version = model_version('Course')
+    keys = [_key(user_id, version) for user_id in user_ids]
+    transaction.on_commit(partial(cache.delete_many, keys))
+
+
+def forget_students(student_ids):
+    # For Student rows changed with queryset.update(), which sends no signals
+    forget(*Student.objects.filter(id__in=student_ids).values_list('user_id', flat=True))
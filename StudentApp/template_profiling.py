@@ -0,0 +1,85 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.template.base import Template
+from django.template.loader_tags import BlockNode
+
+logger = logging.getLogger(__name__)
+
+# (kind, name) -> [total seconds, calls] for the request being rendered, or None
+# when nobody is collecting (management commands, emails, ...).
+_timings = ContextVar('template_timings', default=None)
+
+
+@contextmanager
+def _timed(kind, name):
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry = timings.setdefault((kind, name), [0.0, 0])
+        entry[0] += time.perf_counter() - start
+        entry[1] += 1
+
+
+def install():
+    # Wraps Template._render and BlockNode.render once per process. Times are
+    # inclusive: base.html contains its blocks, and an {% extends %} child
+    # contains its parent.
+    if getattr(Template, '_profiling_installed', False):
+        return
+
+    template_render = Template._render
+    block_render = BlockNode.render
+
+    def _render(self, context):
+        with _timed('template', self.origin.template_name or self.name or '<string>'):
+            return template_render(self, context)
+
+    def render_block(self, context):
+        template_name = getattr(self.origin, 'template_name', None) or '?'
+        with _timed('block', f'{template_name}#{self.name}'):
+            return block_render(self, context)
+
+    Template._render = _render
+    BlockNode.render = render_block
+    Template._profiling_installed = True
+
+
+def start():
+    return _timings.set({})
+
+
+def stop(token):
+    timings = _timings.get() or {}
+    _timings.reset(token)
+    # Slowest first
+    return sorted(
+        ((kind, name, total, calls) for (kind, name), (total, calls) in timings.items()),
+        key=lambda row: row[2],
+        reverse=True,
+    )
+
+
+def server_timing(report):
+    # Server-Timing header value, so the numbers show up in the browser dev tools
+    parts = []
+    for i, (kind, name, total, calls) in enumerate(report):
+        desc = f'{kind} {name}'.replace('"', "'")
+        parts.append(f'tpl{i};desc="{desc} x{calls}";dur={total * 1000:.2f}')
+    return ', '.join(parts)
+
+
+def log_report(request, report):
+    if not report:
+        return
+    lines = [f'Template render times for {request.method} {request.path}:']
+    for kind, name, total, calls in report:
+        lines.append(f'  {total * 1000:8.2f} ms  {calls:3d}x  {kind:<8} {name}')
+    logger.info('\n'.join(lines))
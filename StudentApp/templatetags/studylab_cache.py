@@ -0,0 +1,12 @@
+from django import template
+
+from StudentApp.cache_versions import model_version as _model_version
+
+register = template.Library()
+
+
+# Usage: {% model_version 'Course' as course_version %}
+#        {% cache fragment_timeout course_card course.id course_version %}
+@register.simple_tag
+def model_version(label):
+    return _model_version(label)
@@ -1,3 +1,572 @@
-from django.test import TestCase
+import json
+import multiprocessing
+import os
+import random
+import smtplib
+import subprocess
+import sys
+import tempfile
+import threading
+import uuid
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    attendance_bitmap, attendance_history, installments, leaderboard, metrics, notifications, profiling,
+    student_profiles,
+)
+from .cache_versions import bump_model_version, model_version
+from .models import (
+    Attendance, AttendanceMonth, Batch, BatchRanking, Course, Enrollment, ExamResult, FeePayment, Installment,
+    LeaveApplication, Notification, Student,
+)
+
+
+class ConcurrentEnrollmentTests(TransactionTestCase):
+    # Admission day in miniature (see `manage.py bench_enrollments`): every user
+    # submits the form at once, twice with the same form and once with a fresh
+    # one, for a course with fewer seats than users
+    USERS, SEATS = 8, 5
+
+    def setUp(self):
+        self.course = Course.objects.create(name='Crowded', price=20000, description='-', seat_capacity=self.SEATS)
+        self.users = [User.objects.create_user(f'applicant-{i}') for i in range(self.USERS)]
+
+    def test_seats_and_idempotency_under_concurrent_submits(self):
+        url = reverse('enroll_course', args=[self.course.id])
+        jobs = []
+        for user in self.users:
+            double_click = uuid.uuid4().hex
+            for key in (double_click, double_click, uuid.uuid4().hex):
+                client = Client()
+                client.force_login(user)
+                jobs.append((user, client, key))
+
+        start_line = threading.Barrier(len(jobs))
+        results, errors = [], []
+
+        def submit(user, client, key):
+            start_line.wait()
+            try:
+                response = client.post(url, {
+                    'payment_mode': 'emi', 'phone': '9000000000', 'address': 'Test', 'gender': 'M',
+                    'idempotency_key': key,
+                })
+                results.append((user.id, response.status_code, response.get('Location')))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=job) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertTrue(all(status in (200, 302) for _, status, _ in results), results)
+
+        self.course.refresh_from_db()
+        enrolled = Enrollment.objects.filter(course=self.course).count()
+        self.assertEqual(enrolled, self.SEATS)
+        self.assertEqual(self.course.seats_taken, self.SEATS)
+        self.assertFalse(
+            Enrollment.objects.filter(course=self.course).values('student_user').annotate(n=Count('id')).filter(n__gt=1)
+        )
+
+        # Every redirect for a user points at the same enrollment
+        locations = {}
+        for user_id, status, location in results:
+            if status == 302:
+                locations.setdefault(user_id, set()).add(location)
+        self.assertEqual(len(locations), self.SEATS)
+        self.assertTrue(all(len(found) == 1 for found in locations.values()), locations)
+
+
+class UnreachableMailServer(EmailBackend):
+    def open(self):
+        raise smtplib.SMTPConnectError(421, 'Service not available')
+
+
+class StopLoop(Exception):
+    pass
+
+
+@override_settings(EMAIL_BACKEND='StudentApp.tests.UnreachableMailServer')
+class SendNotificationsTests(TestCase):
+    def setUp(self):
+        for recipient in ('a@example.com', 'a@example.com', 'b@example.com'):
+            Notification.objects.create(recipient=recipient, kind='absence', subject='Absent', body='-')
+
+    def test_connection_failure_releases_the_batch_with_backoff(self):
+        with self.assertLogs('StudentApp.notifications', 'WARNING'):
+            self.assertEqual(notifications.send_pending(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+        for notice in Notification.objects.all():
+            self.assertEqual((notice.status, notice.attempts, notice.claim), ('pending', 1, ''))
+            self.assertIn('Service not available', notice.last_error)
+            self.assertGreater(notice.next_attempt_at, timezone.now())
+        # Not due again until the backoff has passed
+        self.assertEqual(notifications.send_pending(), (0, 0))
+        self.assertEqual(Notification.objects.filter(attempts=1).count(), 3)
+
+    def test_gives_up_after_max_attempts(self):
+        Notification.objects.update(attempts=notifications.MAX_ATTEMPTS - 1)
+        with self.assertLogs('StudentApp.notifications', 'WARNING'):
+            self.assertEqual(notifications.send_pending(), (0, 3))
+        self.assertEqual(Notification.objects.filter(status='failed').count(), 3)
+
+    def test_loop_keeps_running_through_errors(self):
+        # The loop's first sleep ends the test; reaching it means the worker survived
+        with mock.patch('StudentApp.notifications._claim', side_effect=RuntimeError('database is locked')), \
+                mock.patch('StudentApp.management.commands.send_notifications.time.sleep', side_effect=StopLoop), \
+                self.assertLogs('StudentApp.management.commands.send_notifications', 'ERROR'):
+            with self.assertRaises(StopLoop):
+                call_command('send_notifications', '--loop')
+        # Without --loop the error still surfaces
+        with mock.patch('StudentApp.notifications._claim', side_effect=RuntimeError('database is locked')):
+            with self.assertRaises(RuntimeError):
+                call_command('send_notifications')
+
+
+class StudentBatchLinkTests(TestCase):
+    def test_batch_no_links_on_create(self):
+        student = Student.objects.create(user=User.objects.create_user('s1'), student_id='STU-1', phone='1', batch_no='B-7')
+        self.assertEqual(student.batch.name, 'B-7')
+        self.assertEqual(Batch.objects.get(name='B-7').student_count, 1)
+
+    def test_deleted_batch_is_not_recreated(self):
+        batch = Batch.objects.create(name='B-7')
+        student = Student.objects.create(user=User.objects.create_user('s1'), student_id='STU-1', phone='1', batch=batch)
+        batch.delete()
+
+        student.refresh_from_db()
+        self.assertEqual((student.batch_id, student.batch_no), (None, ''))
+        student.phone = '2'
+        student.save()
+        self.assertFalse(Batch.objects.exists())
+
+        # Rows already left with a deleted batch's name are cleared on their next save
+        student = Student.objects.get(pk=student.pk)
+        Student.objects.filter(pk=student.pk).update(batch_no='B-7')
+        student.save()
+        self.assertEqual(student.batch_no, '')
+        self.assertFalse(Batch.objects.exists())
+
+
+class ReconcileInstallmentsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('emi')
+        self.student = Student.objects.create(user=self.user, student_id='STU-1', phone='1', is_fee_paid=True)
+        course = Course.objects.create(name='C', price=12000, description='-')
+        Enrollment.objects.create(student_user=self.user, course=course, payment_mode='emi')
+        self.today = timezone.localdate()
+        self.later = self.today + timedelta(days=100)
+
+    def reconcile(self, today):
+        with self.captureOnCommitCallbacks(execute=True):
+            totals = installments.reconcile(today)
+        self.student.refresh_from_db()
+        return totals
+
+    def test_nothing_due_leaves_the_flag_alone(self):
+        # Only the booking fee paid: not due yet, but not "paid" either
+        Student.objects.filter(pk=self.student.pk).update(is_fee_paid=False)
+        self.assertEqual(Installment.objects.filter(student=self.student).count(), 6)
+        self.assertEqual(self.reconcile(self.today), {'students': 0, 'paid': 0, 'overdue': 0, 'flags': 0})
+        self.assertFalse(self.student.is_fee_paid)
+
+    def test_flag_cleared_while_overdue_and_set_again_once_paid(self):
+        self.reconcile(self.later)
+        self.assertEqual((self.student.is_fee_paid, self.student.fee_hold), (False, True))
+        self.assertEqual(Installment.objects.filter(status='overdue').count(), 3)
+
+        FeePayment.objects.create(student=self.student, amount=6000, mode='EMI')
+        self.assertEqual(self.reconcile(self.later)['flags'], 1)
+        self.assertEqual((self.student.is_fee_paid, self.student.fee_hold), (True, False))
+        self.assertEqual(Installment.objects.filter(status='paid').count(), 3)
+
+    def test_office_flag_is_not_overridden(self):
+        # Flagged unpaid by the office (another enrollment, say) before falling behind
+        Student.objects.filter(pk=self.student.pk).update(is_fee_paid=False)
+        self.reconcile(self.later)
+        self.assertEqual((self.student.is_fee_paid, self.student.fee_hold), (False, False))
+
+        FeePayment.objects.create(student=self.student, amount=6000, mode='EMI')
+        self.assertEqual(self.reconcile(self.later)['flags'], 0)
+        self.assertFalse(self.student.is_fee_paid)
+        self.assertEqual(Installment.objects.filter(status='paid').count(), 3)
+
+
+class ModelVersionTests(TestCase):
+    def test_bump_in_another_process_is_seen_here(self):
+        before = model_version('Course')
+        worker = multiprocessing.get_context('fork').Process(target=bump_model_version, args=('Course',))
+        worker.start()
+        worker.join()
+        self.assertEqual(worker.exitcode, 0)
+        self.assertNotEqual(model_version('Course'), before)
+
+    def test_course_edit_changes_the_card_key(self):
+        course = Course.objects.create(name='C', price=100, description='-')
+        before = model_version('Course')
+        course.price = 200
+        course.save()
+        self.assertNotEqual(model_version('Course'), before)
+
+
+class AsyncViewProfilingTests(TestCase):
+    def test_async_view_frames_are_in_the_wsgi_profile(self):
+        # course_list is an async view; the test Client runs the sync (WSGI) chain
+        with tempfile.TemporaryDirectory() as folder, \
+                override_settings(REQUEST_PROFILE_DIR=folder, REQUEST_PROFILE_SAMPLE_RATE=1):
+            self.assertEqual(self.client.get(reverse('course_list')).status_code, 200)
+            [info] = profiling.list_profiles('course_list')
+            _, stats = profiling.load(info['name'])
+            graph = profiling.call_graph(stats)
+        self.assertIn('StudentApp/views.py', graph['function'])
+        self.assertIn('(course_list)', graph['function'])
+
+
+class MetricsFilesTests(TestCase):
+    def test_scrape_folds_in_files_of_exited_workers(self):
+        with tempfile.TemporaryDirectory() as folder, override_settings(METRICS_DIR=folder):
+            exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                                    capture_output=True, text=True).stdout.strip()
+            row = ['studylab_http_requests_total', [['status', 'fold-test']], 3]
+            with open(os.path.join(folder, f'{exited}.json'), 'w') as handle:
+                json.dump([row], handle)
+            with open(os.path.join(folder, f'{os.getppid()}.json'), 'w') as handle:
+                json.dump([row], handle)
+
+            key = ('studylab_http_requests_total', (('status', 'fold-test'),))
+            self.assertEqual(metrics.collect()[key], 6)
+            self.assertEqual(sorted(os.listdir(folder)), sorted([f'{os.getpid()}.json', f'{os.getppid()}.json']))
+            # Nothing counted twice on the next scrape
+            self.assertEqual(metrics.collect()[key], 6)
+
+
+class AttendanceArchiveTests(TransactionTestCase):
+    # TransactionTestCase: SQLite won't ATTACH an archive inside TestCase's transaction
+    YEARS = 12  # more than SQLite's limit of 10 ATTACHed files
+
+    def setUp(self):
+        self.student = Student.objects.create(user=User.objects.create_user('old-timer'), student_id='STU-1', phone='1')
+        current = attendance_history.academic_year(timezone.localdate())
+        self.years = [year for year in range(current - self.YEARS - 1, current) if year != current - 5]
+        for year in self.years:
+            start, _ = attendance_history.academic_year_range(year)
+            Attendance.objects.create(student=self.student, date=start, status='Present')
+            Attendance.objects.create(student=self.student, date=start + timedelta(days=1), status='Absent')
+        Attendance.objects.create(student=self.student, date=timezone.localdate(), status='Present')
+
+    def tearDown(self):
+        for year in attendance_history.archive_years():
+            attendance_history.archive_path(year).unlink()
+        connection.close()
+
+    def test_history_spans_more_archive_years_than_sqlite_attaches(self):
+        call_command('archive_attendance', '--pause', '0', stdout=open(os.devnull, 'w'))
+        # The gap year gets no file
+        self.assertEqual(attendance_history.archive_years(), self.years)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+        connection.close()
+        total = 2 * len(self.years) + 1
+        self.assertEqual(attendance_history.student_counts(self.student.id), (total, len(self.years) + 1))
+        records = attendance_history.student_records(self.student.id)
+        self.assertEqual(len(records), total)
+        self.assertEqual([record.date for record in records], sorted((record.date for record in records), reverse=True))
+        self.assertEqual(attendance_history.counts_by_student([self.student.id]),
+                         {self.student.id: (total, len(self.years) + 1)})
+
+        # Paging across the groups of years returns every row once, in id order
+        ids, after = [], 0
+        while True:
+            page = attendance_history.rows_after(('id', 'date'), after, 5)
+            if not page:
+                break
+            ids += [row[0] for row in page]
+            after = page[-1][0]
+        self.assertEqual(len(ids), total)
+        self.assertEqual(ids, sorted(set(ids)))
+
+
+class LeaderboardMoveTests(TestCase):
+    def setUp(self):
+        self.batch = Batch.objects.create(name='B-1')
+        self.python, self.java = (Course.objects.create(name=name, price=100, description='-') for name in ('Py', 'Java'))
+        self.students = []
+        for i, marks in enumerate((90, 80, 70)):
+            student = Student.objects.create(
+                user=User.objects.create_user(f'ranked-{i}'), student_id=f'STU-{i}', phone='1',
+                batch=self.batch, course=self.python,
+            )
+            ExamResult.objects.create(student=student, subject='Maths', marks=marks)
+            self.students.append(student)
+        leaderboard.refresh([self.batch.id])
+
+    def ranks(self):
+        return {
+            row.student_id: (row.batch_id, row.course_id, row.rank)
+            for row in BatchRanking.objects.all()
+        }
+
+    def save(self, student, **changes):
+        for field, value in changes.items():
+            setattr(student, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            student.save()
+
+    def test_course_change_reranks_both_courses(self):
+        top, second, third = self.students
+        self.save(top, course=self.java)
+        self.assertEqual(self.ranks(), {
+            top.id: (self.batch.id, self.java.id, 1),
+            second.id: (self.batch.id, self.python.id, 1),
+            third.id: (self.batch.id, self.python.id, 2),
+        })
+
+    def test_joining_a_batch_ranks_the_student(self):
+        top, second, third = self.students
+        self.save(top, batch=None)
+        self.assertNotIn(top.id, self.ranks())
+        self.assertEqual(self.ranks()[second.id][2], 1)
+
+        top = Student.objects.get(pk=top.pk)
+        self.save(top, batch=self.batch)
+        self.assertEqual(self.ranks()[top.id], (self.batch.id, self.python.id, 1))
+        self.assertEqual(self.ranks()[third.id][2], 3)
+
+
+def naive_streaks(rows):
+    # (current, longest) Present run from (date, status) rows, the slow way
+    current = longest = 0
+    for _, status in sorted(rows):
+        current = current + 1 if status == 'Present' else 0
+        longest = max(longest, current)
+    return current, longest
+
+
+class AttendanceBitmapTests(TestCase):
+    def setUp(self):
+        self.student = Student.objects.create(user=User.objects.create_user('packed'), student_id='STU-1', phone='1')
+
+    def bits(self, month):
+        return AttendanceMonth.objects.get(student=self.student, month=month).bits
+
+    def test_two_bits_per_day(self):
+        month = date(2025, 1, 1)
+        attendance_bitmap.mark(self.student.id, date(2025, 1, 1), 'Present')
+        attendance_bitmap.mark(self.student.id, date(2025, 1, 15), 'Absent')
+        attendance_bitmap.mark(self.student.id, date(2025, 1, 31), 'Late')
+        self.assertEqual(self.bits(month), 0b01 | 0b10 << 28 | 0b11 << 60)
+        self.assertEqual(attendance_bitmap.decode(month, self.bits(month)), [
+            (date(2025, 1, 1), 'Present'), (date(2025, 1, 15), 'Absent'), (date(2025, 1, 31), 'Late'),
+        ])
+
+        # Re-marking and unmarking touch only that day's pair
+        attendance_bitmap.mark(self.student.id, date(2025, 1, 15), 'Present')
+        attendance_bitmap.unmark(self.student.id, date(2025, 1, 31))
+        self.assertEqual(self.bits(month), 0b01 | 0b01 << 28)
+        self.assertEqual(attendance_bitmap.status_on(self.student.id, date(2025, 1, 15)), 'Present')
+        self.assertIsNone(attendance_bitmap.status_on(self.student.id, date(2025, 1, 31)))
+        self.assertEqual(attendance_bitmap.summary(self.bits(month))['present'], 2)
+
+    def test_mark_many_matches_mark(self):
+        other = Student.objects.create(user=User.objects.create_user('packed-2'), student_id='STU-2', phone='1')
+        attendance_bitmap.mark(self.student.id, date(2025, 2, 3), 'Late')
+        attendance_bitmap.mark_many(date(2025, 2, 4), {self.student.id: 'Present', other.id: 'Absent'})
+        self.assertEqual(self.bits(date(2025, 2, 1)), 0b11 << 4 | 0b01 << 6)
+        self.assertEqual(attendance_bitmap.status_on(other.id, date(2025, 2, 4)), 'Absent')
+
+    def test_streaks_run_across_month_and_year_ends(self):
+        marks = [
+            (date(2024, 11, 29), 'Absent'),
+            (date(2024, 11, 30), 'Present'),
+            (date(2024, 12, 30), 'Present'),
+            (date(2024, 12, 31), 'Present'),
+            (date(2025, 1, 1), 'Present'),
+            # A gap (holiday) doesn't end the run
+            (date(2025, 1, 6), 'Present'),
+            (date(2025, 1, 7), 'Late'),
+            (date(2025, 2, 28), 'Present'),
+            (date(2025, 3, 1), 'Present'),
+        ]
+        for day, status in marks:
+            attendance_bitmap.mark(self.student.id, day, status)
+        self.assertEqual(attendance_bitmap.streaks(self.student.id), (2, 5))
+        self.assertEqual(attendance_bitmap.streaks(self.student.id), naive_streaks(marks))
+
+
+@override_settings(ATTENDANCE_BITMAP_MIRROR=True)
+class AttendanceMirrorTests(TestCase):
+    def test_bitmap_follows_attendance_rows(self):
+        student = Student.objects.create(user=User.objects.create_user('mirrored'), student_id='STU-1', phone='1')
+        rng = random.Random(32)
+        statuses = ('Present', 'Present', 'Present', 'Absent', 'Late')
+        # Weekdays from November into February, so months and a year end are crossed
+        rows = [
+            Attendance.objects.create(student=student, date=date(2024, 11, 1) + timedelta(days=offset),
+                                      status=rng.choice(statuses))
+            for offset in range(120) if offset % 7 < 5
+        ]
+        for row in rng.sample(rows, 10):
+            row.status = 'Absent' if row.status == 'Present' else 'Present'
+            row.save()
+        for row in rng.sample(rows, 5):
+            row.date += timedelta(days=200)
+            row.save()
+        for row in rng.sample(rows, 5):
+            row.delete()
+
+        expected = list(Attendance.objects.filter(student=student).order_by('-date').values_list('date', 'status'))
+        self.assertEqual(attendance_bitmap.records(student.id), expected)
+        self.assertEqual(attendance_bitmap.counts(student.id), attendance_history.student_counts(student.id))
+        self.assertEqual(attendance_bitmap.streaks(student.id), naive_streaks(expected))
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.users, self.students = [], []
+        for name in ('alice', 'bob'):
+            user = User.objects.create_user(name)
+            student = Student.objects.create(user=user, student_id=f'STU-{name}', phone='1')
+            for offset in range(3):
+                Attendance.objects.create(student=student, date=date(2025, 3, 3) + timedelta(days=offset), status='Present')
+            LeaveApplication.objects.create(student=student, start_date=date(2025, 4, 1), end_date=date(2025, 4, 2), reason='-')
+            Enrollment.objects.create(student_user=user, course=Course.objects.create(name=name, price=1, description='-'))
+            self.users.append(user)
+            self.students.append(student)
+
+    def pages(self, url, limit, between_pages=None):
+        ids, cursor = [], None
+        while True:
+            query = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get(url, query)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids += [row['id'] for row in data['results']]
+            cursor = data['next']
+            if not cursor:
+                return ids
+            if between_pages:
+                between_pages()
+
+    def test_cursor_pages_stay_continuous_while_rows_are_added(self):
+        self.client.force_login(User.objects.create_user('office', is_staff=True))
+        added = iter(range(10))
+
+        def insert():
+            # A new course and attendance for a later day land after the cursor
+            n = next(added)
+            Course.objects.create(name=f'new-{n}', price=1, description='-')
+            Attendance.objects.create(student=self.students[0], date=date(2025, 5, 1) + timedelta(days=n), status='Late')
+
+        for resource, model in (('api_courses', Course), ('api_attendance', Attendance)):
+            ids = self.pages(reverse(resource), 2, insert)
+            # Every row once, in order - including ones added mid-way
+            self.assertEqual(ids, list(model.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_unchanged_page_answers_304(self):
+        url = reverse('api_courses')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], etag)
+        self.assertEqual(again.content, b'')
+
+        Course.objects.create(name='new', price=1, description='-')
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_students_see_only_their_own_rows(self):
+        alice, bob = self.students
+        self.client.force_login(self.users[0])
+        owners = {
+            'api_students': ('id', {alice.id}),
+            'api_attendance': ('student', {alice.id}),
+            'api_leaves': ('student', {alice.id}),
+            'api_enrollments': ('course', {Enrollment.objects.get(student_user=self.users[0]).course_id}),
+        }
+        for name, (key, expected) in owners.items():
+            rows = self.client.get(reverse(name)).json()['results']
+            self.assertTrue(rows, name)
+            self.assertEqual({row[key] for row in rows}, expected, name)
+
+        # Bob's rows stay out of Alice's pages, cursor or not
+        self.assertEqual(len(self.pages(reverse('api_attendance'), 1)), 3)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_attendance')).status_code, 401)
+
+
+class StudentProfileCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('cached')
+        course = Course.objects.create(name='C', price=1, description='-')
+        self.student = Student.objects.create(user=self.user, student_id='STU-1', phone='1', course=course)
+
+    def request(self, user=None):
+        request = RequestFactory().get('/')
+        request.user = user or self.user
+
+        async def auser():
+            return request.user
+        request.auser = auser
+        return request
+
+    def test_profile_is_cached_across_requests(self):
+        with self.assertNumQueries(1):
+            student = student_profiles.get_student(self.request())
+            # course joined, user taken from the request
+            self.assertEqual((student.course.name, student.user.username), ('C', 'cached'))
+        with self.assertNumQueries(0):
+            request = self.request()
+            self.assertEqual(student_profiles.get_student(request).pk, self.student.pk)
+            student_profiles.get_student(request)
+
+    def test_missing_profile_is_cached_too(self):
+        staff = User.objects.create_user('office', is_staff=True)
+        with self.assertNumQueries(1):
+            self.assertIsNone(student_profiles.get_student(self.request(staff)))
+        with self.assertNumQueries(0):
+            self.assertIsNone(student_profiles.get_student(self.request(staff)))
+
+    def test_async_lookup_shares_the_cache(self):
+        # Run from sync code so assertNumQueries sees the async ORM's queries,
+        # which sync_to_async sends back to this thread
+        astudent = async_to_sync(student_profiles.aget_student)
+        with self.assertNumQueries(1):
+            self.assertEqual(astudent(self.request()).course.name, 'C')
+        with self.assertNumQueries(0):
+            self.assertEqual(astudent(self.request()).pk, self.student.pk)
+            self.assertEqual(student_profiles.get_student(self.request()).pk, self.student.pk)
+
+    def test_saving_the_student_drops_the_cached_profile(self):
+        student_profiles.get_student(self.request())
+        self.student.phone = '2'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(student_profiles.get_student(self.request()).phone, '2')
+        with self.assertNumQueries(0):
+            student_profiles.get_student(self.request())
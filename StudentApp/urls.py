@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, metrics, views
 
 urlpatterns = [
     path('', views.student_login, name='login'),
@@ -13,4 +13,16 @@ urlpatterns = [
     path('enroll/<int:course_id>/', views.enroll_course, name='enroll_course'),
     path('enroll/success/<int:enrollment_id>/', views.enroll_success, name='enroll_success'),
     path('apply/<int:course_id>/', views.guest_admission, name='guest_admission'),
+    path('results/leaderboard/', views.batch_leaderboard, name='batch_leaderboard'),
+    path('placement/shortlist/', views.placement_shortlist, name='placement_shortlist'),
+    path('profiles/', views.profile_list, name='profile_list'),
+    path('profiles/<str:name>/', views.profile_detail, name='profile_detail'),
+    path('metrics/', metrics.exposition, name='metrics'),
+
+    # Read-only JSON API for the mobile app (see api.py)
+    path('api/courses/', api.resource_list, {'resource': 'courses'}, name='api_courses'),
+    path('api/students/', api.resource_list, {'resource': 'students'}, name='api_students'),
+    path('api/attendance/', api.resource_list, {'resource': 'attendance'}, name='api_attendance'),
+    path('api/leaves/', api.resource_list, {'resource': 'leaves'}, name='api_leaves'),
+    path('api/enrollments/', api.resource_list, {'resource': 'enrollments'}, name='api_enrollments'),
 ]
\ No newline at end of file
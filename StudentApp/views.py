@@ -1,11 +1,30 @@
-from django.shortcuts import get_object_or_404, render, redirect
+import csv
+
+from django.shortcuts import aget_object_or_404, get_object_or_404, render, redirect
+from django.core.paginator import Paginator
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import AdmissionRequest, Enrollment, LeaveApplication,Student,Attendance,Course
+from .models import AdmissionRequest, Batch, BatchRanking, Enrollment, LeaveApplication,Student,Attendance,Course, SubjectTopper
+from . import attendance_history, enrollments, leaderboard, placement, profiling
 from .forms import LeaveForm
+from .notifications import queue_absences
+from asgiref.sync import sync_to_async
+from django.db import transaction
 from django.utils import timezone
 from django.contrib.admin.views.decorators import staff_member_required
+
+
+# --- ASYNC HELPERS ---
+# The async views below run under Studylab/asgi.py. Context processors and templates
+# read `request.user`, whose lazy loader uses the sync ORM, so swap in the user we
+# already loaded through the async path before rendering.
+async def _aresolve_user(request):
+    user = await request.auser()
+    request.user = user
+    return user
+
 # --- VIEW 1: LOGIN ---
 def student_login(request):
     if request.method == 'POST':
@@ -25,18 +44,17 @@ def student_login(request):
 
 # --- VIEW 2: DASHBOARD ---
 @login_required(login_url='login')  # Force them to login first
-def dashboard(request):
-    user = request.user
+async def dashboard(request):
+    user = await _aresolve_user(request)
     
     # 1. If the user is an Admin/Staff, show a different view or just the sidebar links
     if user.is_staff:
         # You can pass total student count, etc., for admins here
         return render(request, 'dashboard.html', {'is_admin': True})
 
-    # 2. If it's a Student, try to get their profile
-    try:
-        student_profile = Student.objects.get(user=user)
-    except Student.DoesNotExist:
+    # 2. If it's a Student, get their profile (cached, course joined)
+    student_profile = await request.astudent()
+    if student_profile is None:
         # If they are logged in but don't have a Student profile yet (e.g., just signed up)
         return render(request, 'dashboard.html', {
             'error': 'Profile not found. Please contact admin.'
@@ -44,8 +62,8 @@ def dashboard(request):
 
     # 3. Calculate Attendance Percentage (Optional Logic)
     # This is a simple calculation: (Days Present / Total Days) * 100
-    total_days = Attendance.objects.filter(student=student_profile).count()
-    present_days = Attendance.objects.filter(student=student_profile, status='Present').count()
+    # (including archived academic years)
+    total_days, present_days = await sync_to_async(attendance_history.student_counts)(student_profile.id)
     
     attendance_percentage = 0
     if total_days > 0:
@@ -65,20 +83,14 @@ def user_logout(request):
 
 @login_required(login_url='login')
 def student_profile(request):
-    try:
-        student = Student.objects.get(user=request.user)
-    except Student.DoesNotExist:
-        student = None
-    
-    # We pass the 'student' object. 
+    # We pass the 'student' object (None without a profile).
     # The HTML will automatically get the image from 'student.profile_image'
-    return render(request, 'profile.html', {'student': student})
+    return render(request, 'profile.html', {'student': request.student or None})
 
 @login_required(login_url='login')
 def apply_leave(request):
-    try:
-        student = request.user.student
-    except Student.DoesNotExist:
+    student = request.student
+    if not student:
         return render(request, 'error.html', {'message': 'You are not a registered student.'})
 
     # --- NEW: Fetch the leave history for this student ---
@@ -100,23 +112,35 @@ def apply_leave(request):
 # --- VIEW 5: VIEW LEAVE STATUS ---
 @staff_member_required # Only Admin/Staff can access this
 def admin_mark_attendance(request):
-    batches = Student.objects.values_list('batch_no', flat=True).distinct()
+    # Batch table + its denormalized count, instead of scanning Student.batch_no
+    batches = Batch.objects.filter(student_count__gt=0).order_by('name')
     selected_batch = request.GET.get('batch')
     students = Student.objects.none()
 
-    if selected_batch:
-        students = Student.objects.filter(batch_no=selected_batch).select_related('user')
+    if selected_batch and selected_batch.isdigit():
+        students = Student.objects.filter(batch_id=selected_batch).select_related('user')
 
     if request.method == 'POST':
         date = request.POST.get('date')
-        for student in students:
-            status = request.POST.get(f'status_{student.id}')
-            if status:
-                Attendance.objects.update_or_create(
-                    student=student, 
-                    date=date, 
-                    defaults={'status': status}
-                )
+        # Who was already marked absent that day, so re-saving the form doesn't mail them twice
+        already_absent = set(
+            Attendance.objects.filter(student__in=students, date=date, status='Absent').values_list('student_id', flat=True)
+        )
+        newly_absent = []
+
+        # One transaction for the whole register (and its notification outbox rows)
+        with transaction.atomic():
+            for student in students:
+                status = request.POST.get(f'status_{student.id}')
+                if status:
+                    Attendance.objects.update_or_create(
+                        student=student, 
+                        date=date, 
+                        defaults={'status': status}
+                    )
+                    if status == 'Absent' and student.id not in already_absent:
+                        newly_absent.append(student)
+            queue_absences(newly_absent, date)
         return redirect(f'{request.path}?batch={selected_batch}')
 
     return render(request, 'admin_mark.html', {
@@ -128,19 +152,20 @@ def admin_mark_attendance(request):
 
 # --- STUDENT VIEW: See My Stats ---
 @login_required # Login required, but any user can access
-def student_my_attendance(request):
+async def student_my_attendance(request):
     # 1. Get the logged-in student profile
-    try:
-        student = request.user.student 
-    except Student.DoesNotExist:
+    await _aresolve_user(request)
+    student = await request.astudent()
+    if student is None:
         return render(request, 'attendance/error.html', {'message': "No student profile found for this user."})
 
-    # 2. Get all records for this student
-    records = Attendance.objects.filter(student=student).order_by('-date')
+    # 2. Get all records for this student, archived years included
+    # (evaluated here, templates can't hit the ORM from async code)
+    records = await sync_to_async(attendance_history.student_records)(student.id)
 
-    # 3. Calculate Stats (Present vs Total)
-    total_days = records.count()
-    present_days = records.filter(status='Present').count()
+    # 3. Calculate Stats (Present vs Total) from the rows we already have
+    total_days = len(records)
+    present_days = sum(1 for record in records if record.status == 'Present')
     
     attendance_percentage = 0
     if total_days > 0:
@@ -153,9 +178,11 @@ def student_my_attendance(request):
         'percentage': round(attendance_percentage, 1)
     })
 
-def course_list(request):
+async def course_list(request):
+    await _aresolve_user(request)
+
     # Fetch all courses from the database
-    courses = Course.objects.all() 
+    courses = [course async for course in Course.objects.all()]
     
     context = {
         'courses': courses
@@ -168,49 +195,45 @@ def course_list(request):
 @login_required(login_url='login')
 def enroll_course(request, course_id):
     course = get_object_or_404(Course, id=course_id)
-    
-    # Now it is safe to check for the student profile because the user is definitely logged in.
-    if not hasattr(request.user, 'student'):
-        from .models import Student
-        import uuid
-        Student.objects.create(user=request.user, student_id=str(uuid.uuid4())[:8])
+    error = None
 
     if request.method == 'POST':
-        # 1. UPDATE STUDENT DETAILS FIRST
-        try:
-            student = request.user.student
-        except Student.DoesNotExist:
-             # Just in case the signal didn't work, create it again safely
-             from .models import Student
-             import uuid
-             student = Student.objects.create(user=request.user, student_id=str(uuid.uuid4())[:8])
-
-        student.phone = request.POST.get('phone')
-        student.address = request.POST.get('address')
-        student.gender = request.POST.get('gender')
-        student.save()
-
-        # 2. CREATE ENROLLMENT
         selected_mode = request.POST.get('payment_mode')
-        
-        enrollment = Enrollment(
-            student_user=request.user,
-            course=course,
-            payment_mode=selected_mode,
-            amount_paid=5000 if selected_mode != 'full' else course.price
-        )
-        enrollment.save()
-        
-        return redirect('enroll_success', enrollment_id=enrollment.id) 
+        if selected_mode not in dict(Enrollment.PAYMENT_CHOICES):
+            error = 'Please choose a payment mode.'
+        else:
+            # Student profile, enrollment and seat in one transaction (enrollments.py).
+            # A double-click or retry comes back with the enrollment it already made.
+            try:
+                enrollment, _ = enrollments.enroll(
+                    request.user,
+                    course,
+                    selected_mode,
+                    idempotency_key=request.POST.get('idempotency_key'),
+                    phone=request.POST.get('phone', ''),
+                    address=request.POST.get('address', ''),
+                    gender=request.POST.get('gender', 'M'),
+                )
+            except enrollments.CourseFull:
+                error = 'Sorry, this course is full.'
+            else:
+                return redirect('enroll_success', enrollment_id=enrollment.id)
 
     context = {
         'course': course,
+        # Prefills the form for students enrolling in another course
+        'student': request.student,
+        'error': error,
+        # New key per form render; resubmitting the same form reuses it
+        'idempotency_key': request.POST.get('idempotency_key') or enrollments.new_idempotency_key(),
     }
     return render(request, 'enroll_payment.html', context)
 
-def enroll_success(request, enrollment_id):
-    # Fetch the enrollment record by ID
-    enrollment = get_object_or_404(Enrollment, id=enrollment_id)
+async def enroll_success(request, enrollment_id):
+    await _aresolve_user(request)
+
+    # Fetch the enrollment record by ID (course joined so the template doesn't query it)
+    enrollment = await aget_object_or_404(Enrollment.objects.select_related('course'), id=enrollment_id)
     
     context = {
         'enrollment': enrollment,
@@ -241,4 +264,125 @@ def guest_admission(request, course_id):
         # Show a success message
         return render(request, 'admission_sent.html')
 
-    return render(request, 'guest_form.html', {'course': course})
\ No newline at end of file
+    return render(request, 'guest_form.html', {'course': course})
+
+
+# --- STAFF: BATCH LEADERBOARD + RESULTS UPLOAD (see leaderboard.py) ---
+@staff_member_required
+def batch_leaderboard(request):
+    batches = Batch.objects.filter(student_count__gt=0).order_by('name')
+    selected_batch = request.GET.get('batch', '')
+    upload_error = upload_summary = None
+
+    if request.method == 'POST':
+        upload = request.FILES.get('results')
+        if upload is None:
+            upload_error = 'Choose a CSV file to upload.'
+        else:
+            try:
+                rows = leaderboard.parse_csv(upload.read().decode('utf-8-sig'))
+                created, updated, refreshed = leaderboard.import_results(rows)
+            except (leaderboard.UploadError, UnicodeDecodeError) as exc:
+                upload_error = str(exc)
+            else:
+                upload_summary = f'{created} result(s) added, {updated} updated, {refreshed} batch(es) re-ranked.'
+
+    rankings = toppers = []
+    if selected_batch.isdigit():
+        rankings = (
+            BatchRanking.objects.filter(batch_id=selected_batch)
+            .select_related('student__user', 'course')
+            .order_by('course__name', 'rank')
+        )
+        toppers = (
+            SubjectTopper.objects.filter(batch_id=selected_batch)
+            .select_related('student__user', 'course')
+            .order_by('course__name', 'subject')
+        )
+
+    return render(request, 'leaderboard.html', {
+        'batches': batches,
+        'selected_batch': selected_batch,
+        'rankings': rankings,
+        'toppers': toppers,
+        'upload_error': upload_error,
+        'upload_summary': upload_summary,
+    })
+
+
+# --- STAFF: PLACEMENT SHORTLIST (see placement.py) ---
+class _Echo:
+    # csv.writer target that hands each line straight back, for streaming
+    def write(self, value):
+        return value
+
+
+@staff_member_required
+def placement_shortlist(request):
+    selected_course = request.GET.get('course', '')
+    course_id = int(selected_course) if selected_course.isdigit() else None
+
+    if request.GET.get('export') == 'csv':
+        writer = csv.writer(_Echo())
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in placement.export_rows(course_id)),
+            content_type='text/csv',
+        )
+        response['Content-Disposition'] = 'attachment; filename="placement_shortlist.csv"'
+        return response
+
+    rows = (
+        placement.shortlist(course_id)
+        .select_related('student__user', 'student__batch', 'course')
+        .order_by('course__name', 'student__student_id')
+    )
+    page = Paginator(rows, 100).get_page(request.GET.get('page'))
+    return render(request, 'placement_shortlist.html', {
+        'page': page,
+        'courses': Course.objects.order_by('name').values('id', 'name'),
+        'selected_course': selected_course,
+        'rule': placement.rule_for(course_id) if course_id else None,
+    })
+
+
+# --- STAFF: REQUEST PROFILES (see profiling.py) ---
+@staff_member_required
+def profile_list(request):
+    if request.method == 'POST':
+        response = redirect('profile_list')
+        if request.POST.get('action') == 'start':
+            profiling.enable_for(response)
+        else:
+            profiling.disable_for(response)
+        return response
+
+    selected_view = request.GET.get('view', '')
+    profiles = profiling.list_profiles(selected_view or None)
+    return render(request, 'profiles.html', {
+        'profiles': profiles,
+        'views': sorted({info['url_name'] for info in profiling.list_profiles()}),
+        'selected_view': selected_view,
+        'profiling_on': request.COOKIES.get(profiling.COOKIE_NAME) is not None,
+        'profiling_minutes': profiling.COOKIE_MAX_AGE // 60,
+    })
+
+
+@staff_member_required
+def profile_detail(request, name):
+    loaded = profiling.load(name)
+    if loaded is None:
+        raise Http404('No such profile')
+    info, stats = loaded
+
+    if request.GET.get('download'):
+        return FileResponse(open(profiling.profile_dir() / f'{name}.prof', 'rb'), as_attachment=True, filename=f'{name}.prof')
+
+    sort = request.GET.get('sort', 'cumulative')
+    return render(request, 'profile_detail.html', {
+        'info': info,
+        'sort': sort,
+        'functions': profiling.top_functions(stats, sort),
+        'total_calls': stats.total_calls,
+        'total_ms': stats.total_tt * 1000,
+        'graph': profiling.call_graph(stats),
+    })
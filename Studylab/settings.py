@@ -42,13 +42,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'StudentApp.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'StudentApp.middleware.StudentProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'StudentApp.middleware.TemplateProfilingMiddleware',
+    'StudentApp.middleware.RequestProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'Studylab.urls'
@@ -56,13 +60,21 @@ ROOT_URLCONF = 'Studylab.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [os.path.join(BASE_DIR,'templates')],
-        'APP_DIRS': True,
+        'DIRS': [os.path.join(BASE_DIR,'Templates')],
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'StudentApp.context_processors.fragment_cache',
+            ],
+            # Parse each template once per process. The dev server's autoreloader
+            # clears this cache when a template file changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -70,6 +82,29 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'Studylab.wsgi.application'
 
+# Template fragment caching ({% cache %} blocks in course.html, dashboard.html, base.html),
+# in seconds. Set TEMPLATE_FRAGMENT_TIMEOUT=0 in the environment while editing
+# templates so changes show up straight away.
+TEMPLATE_FRAGMENT_TIMEOUT = int(os.environ.get('TEMPLATE_FRAGMENT_TIMEOUT', 60 * 60))
+
+# Log render time per template / block and send a Server-Timing header.
+# Off unless TEMPLATE_PROFILING=1 is set in the environment.
+TEMPLATE_PROFILING = os.environ.get('TEMPLATE_PROFILING', '') == '1'
+
+# cProfile dumps of single requests, browsed by staff at /profiles/.
+# Staff switch profiling on for their own requests from that page; a sample
+# rate > 0 also profiles that fraction of everyone's requests.
+REQUEST_PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+REQUEST_PROFILE_SAMPLE_RATE = 0.0
+REQUEST_PROFILE_KEEP = 200  # oldest profiles are deleted past this
+
+# Prometheus metrics at /metrics/ (see StudentApp/metrics.py). Scrape with
+# `Authorization: Bearer $METRICS_TOKEN`; staff can also open it when logged in.
+METRICS_ENABLED = True
+METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_FLUSH_INTERVAL = 5  # seconds between writes of each worker's counters
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -78,9 +113,54 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts instead of failing with
+            # "database is locked" when two requests upgrade their read locks at once
+            # (admission-day enrollments); wait up to `timeout` seconds for it.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # On disk rather than in memory, so StudentApp's concurrent enrollment
+        # test can write from several threads at once
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Keeps files shared between processes (CACHE_DIR, METRICS_DIR) in a temp dir during tests
+TEST_RUNNER = 'Studylab.test_runner.TestRunner'
+
+
+# Cache. Template fragments and the model versions in their keys
+# (cache_versions.py) are files under CACHE_DIR, shared by every worker process,
+# so an edit shows up on all of them straight away. 'default' is per process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'studylab',
+    },
+    # {% cache %} uses this alias when it exists
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# Seconds a request.student lookup is cached (StudentProfileMiddleware). The
+# default cache is per process: a Student save clears the entry in the process
+# that made it, but other workers can show the old profile (batch, fee status)
+# for up to this long. Kept short on purpose; it only has to absorb a user's
+# burst of page loads, and a miss is one query.
+STUDENT_PROFILE_TTL = 30
+
+
+# Email (notification outbox, sent by `manage.py send_notifications`)
+
+DEFAULT_FROM_EMAIL = 'StudyLab <no-reply@studylab.local>'
+if DEBUG:
+    EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -119,6 +199,17 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR,'static')]
 STATIC_ROOT = os.path.join(BASE_DIR,'assets')
+# Closed academic years of attendance are moved here by `manage.py archive_attendance`
+ATTENDANCE_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive')
+ACADEMIC_YEAR_START_MONTH = 6  # June
+
+# Repeat Attendance writes in the packed per-month table (AttendanceMonth) while
+# moving to it; see `manage.py attendance_bitmap`
+ATTENDANCE_BITMAP_MIRROR = False
+
+# Compressed online snapshots of the database (`manage.py db_snapshot`)
+DB_SNAPSHOT_DIR = os.path.join(BASE_DIR, 'snapshots')
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR,'media')
 
@@ -126,3 +217,14 @@ MEDIA_ROOT = os.path.join(BASE_DIR,'media')
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'StudentApp': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
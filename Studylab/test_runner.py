@@ -0,0 +1,34 @@
+import atexit
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from StudentApp import metrics
+
+
+# `manage.py test` with the files the site shares between processes (the
+# fragment cache, metrics counters, attendance archives) in a temp dir, so test runs neither read
+# nor leave anything in the project's own.
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._scratch = Path(tempfile.mkdtemp(prefix='studylab-test-'))
+        caches = {alias: dict(config) for alias, config in settings.CACHES.items()}
+        caches['template_fragments']['LOCATION'] = str(self._scratch / 'cache')
+        self._overrides = override_settings(
+            CACHES=caches,
+            METRICS_DIR=str(self._scratch / 'metrics'),
+            ATTENDANCE_ARCHIVE_DIR=str(self._scratch / 'archive'),
+        )
+        self._overrides.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        # The exit-time flush would write this run's counters to the real METRICS_DIR
+        atexit.unregister(metrics.flush)
+        self._overrides.disable()
+        shutil.rmtree(self._scratch, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -6,6 +6,8 @@ from django.conf.urls.static import static
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('StudentApp.urls')),
+    path('trainer/', include('TrainerApp.urls')),
+    path('bdm/', include('BdmApp.urls')),
   
 ]
 
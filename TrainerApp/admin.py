@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import AttendanceChange
 
-# Register your models here.
+
+@admin.register(AttendanceChange)
+class AttendanceChangeAdmin(admin.ModelAdmin):
+    list_display = ('id', 'student_code', 'batch_no', 'date', 'status', 'changed_at')
+    list_filter = ('batch_no', 'status')
+    search_fields = ('student_code',)
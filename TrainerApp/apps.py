@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TrainerappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'TrainerApp'
+
+    def ready(self):
+        import TrainerApp.signals
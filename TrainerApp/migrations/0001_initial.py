@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_code', models.CharField(max_length=20)),
+                ('batch_no', models.CharField(max_length=50)),
+                ('date', models.DateField()),
+                ('status', models.CharField(blank=True, max_length=10)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['batch_no', 'id'], name='TrainerApp__batch_n_ef79f6_idx')],
+            },
+        ),
+    ]
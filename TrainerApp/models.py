@@ -1,3 +1,21 @@
 from django.db import models
 
-# Create your models here.
+
+# --- Attendance change log (for tablet sync) ---
+# Every write to StudentApp.Attendance adds a row here. The auto-increment id is
+# the sync position: a client that last saw change N asks for id > N.
+# Student details are copied in (not a FK) so the log survives student deletes.
+class AttendanceChange(models.Model):
+    student_code = models.CharField(max_length=20)  # Student.student_id
+    batch_no = models.CharField(max_length=50)
+    date = models.DateField()
+    status = models.CharField(max_length=10, blank=True)  # '' means the record was removed
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['batch_no', 'id']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.student_code} - {self.date} - {self.status or 'removed'}"
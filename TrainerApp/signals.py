@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from StudentApp.models import Attendance, Student
+from .models import AttendanceChange
+
+
+# Single-row writes (admin_mark_attendance, shell, admin...) go through these.
+# The bulk sync in views.py uses bulk_create/bulk_update, which send no signals,
+# so it logs its creates/updates itself; its deletes still arrive here.
+def _log_change(attendance, status):
+    student = Student.objects.filter(pk=attendance.student_id).values('student_id', 'batch__name').first()
+    if student is None:
+        return
+    AttendanceChange.objects.create(
+        student_code=student['student_id'],
+        batch_no=student['batch__name'] or '',
+        date=attendance.date,
+        status=status,
+    )
+
+
+@receiver(post_save, sender=Attendance)
+def log_attendance_saved(sender, instance, **kwargs):
+    _log_change(instance, instance.status)
+
+
+@receiver(post_delete, sender=Attendance)
+def log_attendance_deleted(sender, instance, **kwargs):
+    _log_change(instance, '')
@@ -1,3 +1,45 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from StudentApp.models import Attendance, Batch, Student
+
+
+class AttendanceSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.trainer = User.objects.create_user('trainer', password='pw', is_staff=True)
+        batch = Batch.objects.create(name='B-1')
+        user = User.objects.create_user('student')
+        cls.student = Student.objects.create(user=user, student_id='STU-9001', phone='1', batch=batch)
+
+    def setUp(self):
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.force_login(self.trainer)
+        self.url = reverse('trainer_attendance_sync')
+
+    def post(self, payload, **extra):
+        return self.client.post(self.url, json.dumps(payload), content_type='application/json', **extra)
+
+    def test_get_sets_csrf_cookie_for_the_post(self):
+        response = self.client.get(self.url, {'batch': 'B-1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('csrftoken', response.cookies)
+
+        payload = {'batch': 'B-1', 'date': '2025-12-20', 'marks': {'STU-9001': 'Present'}}
+        self.assertEqual(self.post(payload).status_code, 403)
+        response = self.post(payload, HTTP_X_CSRFTOKEN=response.cookies['csrftoken'].value)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['applied']['created'], 1)
+
+    def test_non_string_status_is_a_400(self):
+        token = self.client.get(self.url, {'batch': 'B-1'}).cookies['csrftoken'].value
+        for status in (1, ['Present'], None):
+            response = self.post(
+                {'batch': 'B-1', 'date': '2025-12-20', 'marks': {'STU-9001': status}}, HTTP_X_CSRFTOKEN=token,
+            )
+            self.assertEqual(response.status_code, 400, status)
+            self.assertIn('error', response.json())
+        self.assertFalse(Attendance.objects.exists())
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('api/attendance/sync/', views.attendance_sync, name='trainer_attendance_sync'),
+]
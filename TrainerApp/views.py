@@ -1,3 +1,178 @@
-from django.shortcuts import render
+import json
+from functools import wraps
 
-# Create your views here.
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import require_http_methods
+
+from StudentApp import attendance_bitmap, placement
+from StudentApp.models import Attendance, Student
+from .models import AttendanceChange
+
+# Max changes returned per sync; the client keeps calling while "more" is true
+SYNC_PAGE_SIZE = 1000
+
+VALID_STATUSES = {choice for choice, _ in Attendance.STATUS_CHOICES}
+
+
+# JSON version of staff_member_required - tablets want a 403, not a login page
+def trainer_required(view_func):
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated or not request.user.is_staff:
+            return JsonResponse({'error': 'Trainer login required.'}, status=403)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def _parse_token(value):
+    if value in (None, ''):
+        return 0
+    try:
+        token = int(value)
+    except (TypeError, ValueError):
+        return None
+    return token if token >= 0 else None
+
+
+def _changes_since(batch_no, token):
+    # Collapse the log to the latest status per (student, date) so a record that
+    # was flipped five times while the tablet was offline comes back once.
+    rows = list(
+        AttendanceChange.objects
+        .filter(batch_no=batch_no, id__gt=token)
+        .order_by('id')
+        .values_list('id', 'student_code', 'date', 'status')[:SYNC_PAGE_SIZE + 1]
+    )
+    more = len(rows) > SYNC_PAGE_SIZE
+    rows = rows[:SYNC_PAGE_SIZE]
+
+    latest = {}
+    for change_id, student_code, date, status in rows:
+        latest[(student_code, date)] = status
+
+    changes = [
+        {'student_id': student_code, 'date': date.isoformat(), 'status': status or None}
+        for (student_code, date), status in latest.items()
+    ]
+    next_token = rows[-1][0] if rows else token
+    return changes, next_token, more
+
+
+def _apply_day(batch_no, date, marks):
+    # marks is the full day for the batch: {student_id: status}. Anything already
+    # stored that matches is left alone, so sending the same day twice is a no-op.
+    students = dict(Student.objects.filter(batch__name=batch_no).values_list('student_id', 'id'))
+
+    unknown = sorted(set(marks) - set(students))
+    if unknown:
+        return None, f"Not in batch {batch_no}: {', '.join(unknown)}"
+    if not all(isinstance(status, str) for status in marks.values()):
+        return None, 'Each status must be a string.'
+    bad = sorted({status for status in marks.values() if status not in VALID_STATUSES})
+    if bad:
+        return None, f"Invalid status: {', '.join(bad)}"
+
+    # Read and write in one transaction: it takes the write lock up front
+    # (transaction_mode IMMEDIATE), so two identical POSTs run one after the
+    # other and the second finds the first one's rows instead of re-creating them
+    with transaction.atomic():
+        existing = {
+            record.student_id: record
+            for record in Attendance.objects.filter(student_id__in=students.values(), date=date)
+        }
+
+        to_create, to_update, log = [], [], []
+        unchanged = 0
+        for student_code, status in marks.items():
+            pk = students[student_code]
+            record = existing.get(pk)
+            if record is None:
+                to_create.append(Attendance(student_id=pk, date=date, status=status))
+            elif record.status != status:
+                record.status = status
+                to_update.append(record)
+            else:
+                unchanged += 1
+                continue
+            log.append(AttendanceChange(student_code=student_code, batch_no=batch_no, date=date, status=status))
+
+        marked = {students[code] for code in marks}
+        to_delete = [record.pk for pk, record in existing.items() if pk not in marked]
+
+        Attendance.objects.bulk_create(to_create)
+        Attendance.objects.bulk_update(to_update, ['status'])
+        AttendanceChange.objects.bulk_create(log)
+        if to_delete:
+            # Logged by the post_delete receiver in signals.py
+            Attendance.objects.filter(pk__in=to_delete).delete()
+        # The bulk writes above skip StudentApp's signals too, so refresh placement
+        # eligibility here, once the day is committed
+        placement.refresh_on_commit(*[record.student_id for record in to_create + to_update])
+        if attendance_bitmap.mirror_enabled() and (to_create or to_update):
+            attendance_bitmap.mark_many(date, {record.student_id: record.status for record in to_create + to_update})
+
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'deleted': len(to_delete),
+        'unchanged': unchanged,
+    }, None
+
+
+# --- TRAINER API: ATTENDANCE SYNC ---
+# GET  ?batch=Batch-001&since=<token>
+#      -> changes for the batch since the token
+# POST {"batch": "Batch-001", "date": "2025-12-20", "marks": {"STU-1001": "Present", ...}, "since": "<token>"}
+#      -> applies the day as a diff, then returns the same delta as GET
+# POSTs are CSRF-checked like the rest of the site: every response sets the
+# csrftoken cookie, and the tablet sends it back in the X-CSRFToken header.
+@ensure_csrf_cookie
+@trainer_required
+@require_http_methods(['GET', 'POST'])
+def attendance_sync(request):
+    if request.method == 'POST':
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'Body must be JSON.'}, status=400)
+        if not isinstance(payload, dict):
+            return JsonResponse({'error': 'Body must be a JSON object.'}, status=400)
+    else:
+        payload = request.GET
+
+    batch_no = payload.get('batch')
+    if not batch_no:
+        return JsonResponse({'error': 'batch is required.'}, status=400)
+
+    token = _parse_token(payload.get('since'))
+    if token is None:
+        return JsonResponse({'error': 'Invalid sync token.'}, status=400)
+
+    response = {}
+    if request.method == 'POST':
+        try:
+            date = parse_date(str(payload.get('date', '')))
+        except ValueError:
+            date = None
+        marks = payload.get('marks')
+        if date is None:
+            return JsonResponse({'error': 'date must be YYYY-MM-DD.'}, status=400)
+        if not isinstance(marks, dict) or not marks:
+            return JsonResponse({'error': 'marks must be an object of student_id -> status.'}, status=400)
+
+        applied, error = _apply_day(batch_no, date, marks)
+        if error:
+            return JsonResponse({'error': error}, status=400)
+        response['applied'] = applied
+
+    changes, next_token, more = _changes_since(batch_no, token)
+    response.update({
+        'batch': batch_no,
+        'changes': changes,
+        'token': str(next_token),
+        'more': more,
+    })
+    return JsonResponse(response)